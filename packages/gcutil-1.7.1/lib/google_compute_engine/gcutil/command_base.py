@@ -17,18 +17,23 @@
 
 
 import datetime
+import functools
+import hashlib
 import httplib
 import inspect
 import json
 import os
 import re
+import socket
 import sys
+import tempfile
 import time
 import traceback
 
 
 from apiclient import discovery
 from apiclient import errors
+from apiclient import http as apiclient_http
 from apiclient import model
 import httplib2
 import iso8601
@@ -58,6 +63,14 @@ SUPPORTED_VERSIONS = version.__supported_api_versions__
 
 GLOBAL_ZONE_NAME = 'global'
 
+# Documents fetched with --fetch_discovery are cached on disk so that
+# subsequent invocations can skip the round trip to the discovery service.
+DISCOVERY_CACHE_FILE = '~/.gcutil.discovery.%s.%s'
+DISCOVERY_CACHE_TTL_SEC = 24 * 60 * 60
+
+# The maximum number of requests that are sent in a single batch request.
+MAX_REQUESTS_PER_BATCH = 100
+
 # The ordering to impose on machine types when prompting the user for
 # a machine type choice.
 MACHINE_TYPE_ORDERING = ['standard', 'highcpu', 'highmem']
@@ -194,14 +207,41 @@ class ApiThreadPoolOperation(thread_pool.Operation):
   def Run(self):
     """Execute the request on a separate thread."""
     # Note that the httplib2.Http command isn't thread safe.  As such,
-    # we need to create a new Http object here.
-    http = self._command.CreateHttp()
-    result = self._request.execute(http=http)
-    if self._wait_for_operation:
-      result = self._command.WaitForOperation(
-          self._command.GetFlags(), time, result, http=http,
-          collection_name=self._collection_name)
-    return result
+    # we need an Http object that no other thread is using.
+    http = self._command.AcquireHttp()
+    try:
+      result = self._request.execute(http=http)
+      if self._wait_for_operation:
+        result = self._command.WaitForOperation(
+            self._command.GetFlags(), time, result, http=http,
+            collection_name=self._collection_name)
+      return result
+    finally:
+      self._command.ReleaseHttp(http)
+
+
+class CallThreadPoolOperation(thread_pool.Operation):
+  """A thread pool operation that calls an arbitrary function.
+
+  The function is passed its own Http object through the http keyword
+  argument. The result from the object is the function's return value.
+  """
+
+  def __init__(self, func, command):
+    """Initializer."""
+    super(CallThreadPoolOperation, self).__init__()
+    self._func = func
+    self._command = command
+
+  def Run(self):
+    """Call the function on a separate thread."""
+    # Note that the httplib2.Http command isn't thread safe.  As such,
+    # we need an Http object that no other thread is using.
+    http = self._command.AcquireHttp()
+    try:
+      return self._func(http=http)
+    finally:
+      self._command.ReleaseHttp(http)
 
 
 class GoogleComputeCommand(appcommands.Cmd):
@@ -266,6 +306,9 @@ class GoogleComputeCommand(appcommands.Cmd):
     """
     super(GoogleComputeCommand, self).__init__(name, flag_values)
     self._credential = None
+    # Idle Http objects that keep their connections open between
+    # requests. See AcquireHttp.
+    self._idle_https = []
     self.supported_versions = SUPPORTED_VERSIONS
 
     if hasattr(self, 'safety_prompt'):
@@ -690,12 +733,26 @@ class GoogleComputeCommand(appcommands.Cmd):
     if FLAGS.fetch_discovery:
       discovery_uri = (FLAGS.api_host +
                        'discovery/v1/apis/{api}/{apiVersion}/rest')
-      return self.WrapApiIfNeeded(discovery.build(
-          'compute',
-          FLAGS.service_version,
-          http=http,
-          discoveryServiceUrl=discovery_uri,
-          model=json_model))
+      discovery_doc = self._ReadCachedDiscoveryDocument(discovery_uri)
+      if discovery_doc is not None:
+        try:
+          api = discovery.build_from_document(
+              discovery_doc,
+              discovery_uri,
+              http=http,
+              model=json_model)
+        except (ValueError, KeyError, TypeError) as e:
+          # A corrupt cached copy is discarded and fetched again, rather
+          # than breaking every invocation until it expires.
+          LOGGER.debug('Discarding cached discovery document: %s', e)
+          try:
+            os.remove(self._GetDiscoveryCachePath(discovery_uri))
+          except OSError:
+            pass
+        else:
+          return self.WrapApiIfNeeded(api)
+      return self.WrapApiIfNeeded(self._FetchAndCacheDiscoveryDocument(
+          discovery_uri, http, json_model))
     else:
       discovery_file_name = os.path.join(
           os.path.dirname(__file__),
@@ -715,6 +772,84 @@ class GoogleComputeCommand(appcommands.Cmd):
           http=http,
           model=json_model))
 
+  @staticmethod
+  def _GetDiscoveryCachePath(discovery_uri):
+    """Returns the path of the on-disk cache for a discovery document.
+
+    Args:
+      discovery_uri: The discovery service URI template.
+
+    Returns:
+      The expanded path of the cache file.
+    """
+    uri_hash = hashlib.md5(discovery_uri).hexdigest()[:8]
+    return os.path.expanduser(
+        DISCOVERY_CACHE_FILE % (FLAGS.service_version, uri_hash))
+
+  def _ReadCachedDiscoveryDocument(self, discovery_uri, current_time=None):
+    """Reads a previously fetched discovery document from disk.
+
+    Args:
+      discovery_uri: The discovery service URI template.
+      current_time: The current time since the Epoch, in seconds. This is
+        used for testing.
+
+    Returns:
+      The cached discovery document or None if there is no cached copy
+      or if the cached copy is stale.
+    """
+    cache_path = self._GetDiscoveryCachePath(discovery_uri)
+    current_time = time.time() if current_time is None else current_time
+    try:
+      last_modified = os.path.getmtime(cache_path)
+      if not 0 <= current_time - last_modified < DISCOVERY_CACHE_TTL_SEC:
+        return None
+      with open(cache_path) as f:
+        return f.read()
+    except (IOError, OSError) as e:
+      LOGGER.debug('Reading %s failed: %s', cache_path, e)
+    return None
+
+  def _FetchAndCacheDiscoveryDocument(self, discovery_uri, http, json_model):
+    """Fetches the discovery document and writes it to the on-disk cache.
+
+    Args:
+      discovery_uri: The discovery service URI template.
+      http: a httplib2.Http like object for communication.
+      json_model: The model used to serialize requests and responses.
+
+    Returns:
+      The API object built from the fetched discovery document.
+    """
+    requested_url = discovery_uri.format(
+        api='compute', apiVersion=FLAGS.service_version)
+    LOGGER.debug('Fetching discovery document from %s', requested_url)
+    response, content = http.request(requested_url)
+    if response.status >= 400:
+      raise errors.HttpError(response, content, requested_url)
+
+    api = discovery.build_from_document(
+        content,
+        discovery_uri,
+        http=http,
+        model=json_model)
+
+    # The document is written to a temporary file in the same directory
+    # and renamed into place, so that an interrupted or concurrent write
+    # cannot leave a truncated document in the cache.
+    cache_path = self._GetDiscoveryCachePath(discovery_uri)
+    tmp_path = None
+    try:
+      fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path))
+      with os.fdopen(fd, 'w') as f:
+        f.write(content)
+      os.rename(tmp_path, cache_path)
+    except (IOError, OSError) as e:
+      LOGGER.debug('Writing %s failed: %s', cache_path, e)
+      if tmp_path and os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    return api
+
   @staticmethod
   def WrapApiIfNeeded(api):
     """Wraps the API to enable logging or tracing."""
@@ -733,6 +868,9 @@ class GoogleComputeCommand(appcommands.Cmd):
     Returns:
       The name of the resource relative to its enclosing collection.
     """
+    if '/' not in resource_name:
+      # Already relative, so there is nothing to strip.
+      return resource_name
     return resource_name.strip('/').rpartition('/')[2]
 
   @staticmethod
@@ -1006,17 +1144,14 @@ class GoogleComputeCommand(appcommands.Cmd):
     Raises:
       CommandError: If the specified API version is not known.
     """
-    if not (required_version in self.supported_versions and
-            self._flags.service_version in self.supported_versions):
+    try:
+      current_index = self.supported_versions.index(
+          self._flags.service_version)
+      given_index = self.supported_versions.index(required_version)
+    except ValueError:
       raise CommandError('API version %s/%s unknown' % (
           required_version, self._flags.service_version))
 
-    for index, known_version in enumerate(self.supported_versions):
-      if known_version == self._flags.service_version:
-        current_index = index
-      if known_version == required_version:
-        given_index = index
-
     return current_index >= given_index
 
   def _GetResourceApiKind(self, resource):
@@ -1134,6 +1269,27 @@ class GoogleComputeCommand(appcommands.Cmd):
     http = self._AuthenticateWrapper(http)
     return http
 
+  def AcquireHttp(self):
+    """Takes an HTTP object for the exclusive use of the calling thread.
+
+    The object comes from a pool of idle HTTP objects when possible so
+    that its open connections, and thus their TLS sessions, are reused
+    instead of being set up again for every request. It must be handed
+    back with ReleaseHttp once the caller is done with it.
+
+    Returns:
+      An object that implements the httplib2.Http interface
+    """
+    try:
+      # list.pop and list.append are atomic, so no lock is needed.
+      return self._idle_https.pop()
+    except IndexError:
+      return self.CreateHttp()
+
+  def ReleaseHttp(self, http):
+    """Returns an HTTP object obtained from AcquireHttp to the pool."""
+    self._idle_https.append(http)
+
   def RunWithFlagsAndPositionalArgs(self, flag_values, pos_arg_values):
     """Run the command with the parsed flags and positional arguments.
 
@@ -1244,6 +1400,118 @@ class GoogleComputeCommand(appcommands.Cmd):
           results.append(op.Result())
     return (results, exceptions)
 
+  def ExecuteRequestsInBatches(self, requests, collection_name=None):
+    """Executes a list of requests through the batch endpoint.
+
+    Up to MAX_REQUESTS_PER_BATCH requests are sent in each HTTP round
+    trip. Note that every request in a batch is still billed individually
+    against the project's quota.
+
+    Args:
+      requests: A list of request objects to execute.
+      collection_name: The name of the collection the requests mutate.
+
+    Returns:
+      A tuple with (results, exceptions) where result list is the list
+      of all results and exceptions is any exceptions that were
+      raised.
+    """
+    responses = []
+
+    def _Collect(unused_request_id, response, exception):
+      responses.append((response, exception))
+
+    http = self.AcquireHttp()
+    try:
+      for start in xrange(0, len(requests), MAX_REQUESTS_PER_BATCH):
+        batch = apiclient_http.BatchHttpRequest(
+            callback=_Collect, batch_uri=self._flags.api_host + 'batch')
+        batch_requests = requests[start:start + MAX_REQUESTS_PER_BATCH]
+        for request in batch_requests:
+          batch.add(request)
+        num_responses = len(responses)
+        try:
+          batch.execute(http=http)
+        except (errors.Error, httplib.HTTPException, httplib2.HttpLib2Error,
+                socket.error) as e:
+          # The batch as a whole failed, so every request in it that did
+          # not get a response of its own is reported with the batch's
+          # error. Earlier batches may already have made changes, so
+          # their results are kept.
+          num_missing = len(batch_requests) - (len(responses) - num_responses)
+          responses.extend((None, e) for _ in xrange(num_missing))
+    finally:
+      self.ReleaseHttp(http)
+
+    exceptions = [exception for _, exception in responses
+                  if exception is not None]
+    responses = [response for response, exception in responses
+                 if exception is None]
+    if self._flags.synchronous_mode and responses:
+      # The operations are polled concurrently so that the time spent
+      # waiting is bounded by the slowest operation instead of the sum
+      # of the polling round trips of all of them.
+      tp = thread_pool.ThreadPool(
+          min(len(responses), self._flags.concurrent_operations))
+      ops = []
+      for response in responses:
+        op = CallThreadPoolOperation(
+            functools.partial(self.WaitForOperation, self._flags, time,
+                              response, collection_name=collection_name),
+            self)
+        ops.append(op)
+        tp.Add(op)
+      tp.WaitShutdown()
+      responses = []
+      for op in ops:
+        if op.RaisedException():
+          exceptions.append(op.Result())
+        else:
+          responses.append(op.Result())
+
+    results = []
+    for response in responses:
+      if isinstance(response, list):
+        results.extend(response)
+      else:
+        results.append(response)
+    return (results, exceptions)
+
+  def ExecuteConcurrently(self, funcs):
+    """Calls a list of independent functions in a thread pool.
+
+    This is useful for issuing requests that do not depend on each
+    other, such as several list calls, without paying for their round
+    trips one after the other.
+
+    Args:
+      funcs: A list of functions to call. Each function is called with
+        a single http keyword argument holding an httplib2.Http object
+        that it must use for its requests.
+
+    Returns:
+      A list with the return value of each function, in the same order
+      as funcs.
+
+    Raises:
+      Exception: The first exception raised by any of the functions.
+    """
+    if not funcs:
+      return []
+
+    tp = thread_pool.ThreadPool(
+        min(len(funcs), self._flags.concurrent_operations))
+    ops = []
+    for func in funcs:
+      op = CallThreadPoolOperation(func, self)
+      ops.append(op)
+      tp.Add(op)
+    tp.WaitShutdown()
+    for op in ops:
+      if op.RaisedException():
+        raise op.Result()
+    return [op.Result() for op in ops]
+
   def WaitForOperation(self, flag_values, timer, result, http=None,
                        collection_name=None):
     """Wait for a potentially asynchronous operation to complete.
@@ -1306,7 +1574,8 @@ class GoogleComputeCommand(appcommands.Cmd):
         # We are going to replace the operation with its resulting resource.
         # Save the operation to return as well.
         target_link = result['targetLink']
-        http = self.CreateHttp()
+        if http is None:
+          http = self.CreateHttp()
         response, data = http.request(target_link, method='GET')
         if 200 <= response.status <= 299:
           resource = json.loads(data)
@@ -26,14 +26,17 @@ path_initializer.InitializeSysPath()
 import copy
 import datetime
 import os
+import socket
 import sys
 import tempfile
 
 
 
 
+from apiclient import errors
 from google.apputils import app
 import gflags as flags
+import httplib2
 import unittest
 
 from gcutil import command_base
@@ -1331,12 +1334,304 @@ class CommandBaseTest(unittest.TestCase):
     self.assertEqual(30, command._global_operations_api.GetCallCount())
     self.assertEqual(result['status'], 'PENDING')
 
+  def testExecuteConcurrently(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+
+    def MakeFunc(value):
+      def Func(http=None):
+        self.assertNotEqual(http, None)
+        return value
+      return Func
+
+    self.assertEqual(command.ExecuteConcurrently([]), [])
+    self.assertEqual(
+        command.ExecuteConcurrently([MakeFunc(i) for i in xrange(25)]),
+        range(25))
+
+    def Fail(http=None):
+      raise command_base.CommandError('Failed.')
+
+    self.assertRaises(command_base.CommandError,
+                      command.ExecuteConcurrently,
+                      [MakeFunc(1), Fail, MakeFunc(2)])
+
+  def testExecuteRequestsInBatches(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+    batch_sizes = []
+
+    class MockBatchHttpRequest(mock_api.MockBatchHttpRequest):
+
+      def execute(self, http=None):
+        batch_sizes.append(len(self._requests))
+        super(MockBatchHttpRequest, self).execute(http=http)
+
+    class FailingRequest(object):
+
+      def execute(self, http=None):
+        raise command_base.CommandError('Failed.')
+
+    old_batch_http_request = command_base.apiclient_http.BatchHttpRequest
+    command_base.apiclient_http.BatchHttpRequest = MockBatchHttpRequest
+    try:
+      requests = [mock_api.MockRequest({'name': str(i)}) for i in xrange(250)]
+      requests.append(FailingRequest())
+      results, exceptions = command.ExecuteRequestsInBatches(requests)
+    finally:
+      command_base.apiclient_http.BatchHttpRequest = old_batch_http_request
+
+    self.assertEqual(batch_sizes, [100, 100, 51])
+    self.assertEqual(results, [{'name': str(i)} for i in xrange(250)])
+    self.assertEqual(len(exceptions), 1)
+
+  def testExecuteRequestsInBatchesWaitsForEachOperation(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    flag_values.synchronous_mode = True
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+    waited = []
+
+    def MockWaitForOperation(unused_flag_values, unused_timer, result,
+                             http=None, collection_name=None):
+      self.assertNotEqual(http, None)
+      self.assertEqual(collection_name, 'disks')
+      waited.append(result['name'])
+      return dict(result, status='DONE')
+
+    command.WaitForOperation = MockWaitForOperation
+    old_batch_http_request = command_base.apiclient_http.BatchHttpRequest
+    command_base.apiclient_http.BatchHttpRequest = (
+        mock_api.MockBatchHttpRequest)
+    try:
+      requests = [mock_api.MockRequest({'name': str(i), 'status': 'PENDING'})
+                  for i in xrange(5)]
+      results, exceptions = command.ExecuteRequestsInBatches(
+          requests, collection_name='disks')
+    finally:
+      command_base.apiclient_http.BatchHttpRequest = old_batch_http_request
+
+    self.assertEqual(sorted(waited), [str(i) for i in xrange(5)])
+    self.assertEqual(results, [{'name': str(i), 'status': 'DONE'}
+                               for i in xrange(5)])
+    self.assertEqual(exceptions, [])
+
+  def testExecuteRequestsInBatchesCollectsWaitFailures(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    flag_values.synchronous_mode = True
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+
+    def MockWaitForOperation(unused_flag_values, unused_timer, result,
+                             http=None, collection_name=None):
+      if result['name'] in ('1', '3'):
+        raise command_base.CommandError('Failed %s.' % result['name'])
+      return dict(result, status='DONE')
+
+    command.WaitForOperation = MockWaitForOperation
+    old_batch_http_request = command_base.apiclient_http.BatchHttpRequest
+    command_base.apiclient_http.BatchHttpRequest = (
+        mock_api.MockBatchHttpRequest)
+    try:
+      requests = [mock_api.MockRequest({'name': str(i), 'status': 'PENDING'})
+                  for i in xrange(5)]
+      results, exceptions = command.ExecuteRequestsInBatches(requests)
+    finally:
+      command_base.apiclient_http.BatchHttpRequest = old_batch_http_request
+
+    self.assertEqual(results, [{'name': str(i), 'status': 'DONE'}
+                               for i in ('0', '2', '4')])
+    self.assertEqual(sorted(str(e) for e in exceptions),
+                     ['Failed 1.', 'Failed 3.'])
+
+  def testExecuteRequestsInBatchesRecordsBatchFailures(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+    batch_error = errors.HttpError(
+        httplib2.Response({'status': 400}), 'Bad batch.')
+    executed = []
+
+    class MockBatchHttpRequest(mock_api.MockBatchHttpRequest):
+
+      def execute(self, http=None):
+        executed.append(len(self._requests))
+        if len(executed) == 2:
+          raise batch_error
+        super(MockBatchHttpRequest, self).execute(http=http)
+
+    old_batch_http_request = command_base.apiclient_http.BatchHttpRequest
+    command_base.apiclient_http.BatchHttpRequest = MockBatchHttpRequest
+    try:
+      requests = [mock_api.MockRequest({'name': str(i)}) for i in xrange(250)]
+      results, exceptions = command.ExecuteRequestsInBatches(requests)
+    finally:
+      command_base.apiclient_http.BatchHttpRequest = old_batch_http_request
+
+    self.assertEqual(executed, [100, 100, 50])
+    self.assertEqual(results, [{'name': str(i)}
+                               for i in range(100) + range(200, 250)])
+    self.assertEqual(exceptions, [batch_error] * 100)
+
+  def testExecuteRequestsInBatchesRecordsTransportFailures(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+
+    for batch_error in (socket.error('Connection reset.'),
+                        httplib2.ServerNotFoundError('No server.'),
+                        errors.BatchError('Bad batch response.')):
+      executed = []
+
+      class MockBatchHttpRequest(mock_api.MockBatchHttpRequest):
+
+        def execute(self, http=None):
+          executed.append(len(self._requests))
+          if len(executed) == 2:
+            # Fail part way through the batch.
+            self._requests = self._requests[:10]
+            super(MockBatchHttpRequest, self).execute(http=http)
+            raise batch_error
+          super(MockBatchHttpRequest, self).execute(http=http)
+
+      old_batch_http_request = command_base.apiclient_http.BatchHttpRequest
+      command_base.apiclient_http.BatchHttpRequest = MockBatchHttpRequest
+      try:
+        requests = [mock_api.MockRequest({'name': str(i)})
+                    for i in xrange(250)]
+        results, exceptions = command.ExecuteRequestsInBatches(requests)
+      finally:
+        command_base.apiclient_http.BatchHttpRequest = old_batch_http_request
+
+      self.assertEqual(executed, [100, 100, 50])
+      self.assertEqual(results, [{'name': str(i)}
+                                 for i in range(110) + range(200, 250)])
+      self.assertEqual(exceptions, [batch_error] * 90)
+
+  def testAcquireHttpReusesReleasedHttp(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    command.SetFlags(flag_values)
+    command._credential = mock_api.MockCredential()
+
+    http1 = command.AcquireHttp()
+    http2 = command.AcquireHttp()
+    self.assertFalse(http1 is http2)
+
+    command.ReleaseHttp(http1)
+    self.assertTrue(command.AcquireHttp() is http1)
+
+    https = []
+
+    def Func(http=None):
+      https.append(http)
+
+    command.ReleaseHttp(http2)
+    command.ExecuteConcurrently([Func])
+    self.assertEqual(https, [http2])
+    self.assertTrue(command.AcquireHttp() is http2)
+
   def testBuildComputeApi(self):
     """Ensures that building of the API from the discovery succeeds."""
     flag_values = copy.deepcopy(FLAGS)
     command = command_base.GoogleComputeCommand('test_cmd', flag_values)
     command._BuildComputeApi(None)
 
+  def testReadCachedDiscoveryDocument(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    discovery_uri = 'https://www.googleapis.com/discovery/{api}/{apiVersion}'
+
+    old_cache_file = command_base.DISCOVERY_CACHE_FILE
+    cache_dir = tempfile.mkdtemp()
+    command_base.DISCOVERY_CACHE_FILE = os.path.join(cache_dir, '%s.%s')
+    try:
+      self.assertEqual(
+          command._ReadCachedDiscoveryDocument(discovery_uri), None)
+
+      cache_path = command._GetDiscoveryCachePath(discovery_uri)
+      with open(cache_path, 'w') as f:
+        f.write('{"kind": "discovery#restDescription"}')
+      last_modified = os.path.getmtime(cache_path)
+
+      self.assertEqual(
+          command._ReadCachedDiscoveryDocument(
+              discovery_uri, current_time=last_modified + 1),
+          '{"kind": "discovery#restDescription"}')
+      self.assertEqual(
+          command._ReadCachedDiscoveryDocument(
+              discovery_uri,
+              current_time=(last_modified +
+                            command_base.DISCOVERY_CACHE_TTL_SEC)),
+          None)
+      self.assertEqual(
+          command._ReadCachedDiscoveryDocument(
+              discovery_uri, current_time=last_modified - 1),
+          None)
+    finally:
+      command_base.DISCOVERY_CACHE_FILE = old_cache_file
+      for name in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, name))
+      os.rmdir(cache_dir)
+
+  def testBuildComputeApiReplacesCorruptCachedDiscoveryDocument(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = command_base.GoogleComputeCommand('test_cmd', flag_values)
+    discovery_file_name = os.path.join(
+        os.path.dirname(command_base.__file__),
+        'compute/%s.json' % FLAGS.service_version)
+    with open(discovery_file_name) as f:
+      discovery_doc = f.read()
+
+    class MockResponse(object):
+      status = 200
+
+    class MockHttp(object):
+      def __init__(self):
+        self.requested_urls = []
+
+      def request(self, url):
+        self.requested_urls.append(url)
+        return MockResponse(), discovery_doc
+
+    old_cache_file = command_base.DISCOVERY_CACHE_FILE
+    old_fetch_discovery = FLAGS.fetch_discovery
+    cache_dir = tempfile.mkdtemp()
+    command_base.DISCOVERY_CACHE_FILE = os.path.join(cache_dir, '%s.%s')
+    FLAGS.fetch_discovery = True
+    try:
+      discovery_uri = (FLAGS.api_host +
+                       'discovery/v1/apis/{api}/{apiVersion}/rest')
+      cache_path = command._GetDiscoveryCachePath(discovery_uri)
+      with open(cache_path, 'w') as f:
+        f.write(discovery_doc[:len(discovery_doc) / 2])
+
+      http = MockHttp()
+      command._BuildComputeApi(http)
+      self.assertEqual(len(http.requested_urls), 1)
+      with open(cache_path) as f:
+        self.assertEqual(f.read(), discovery_doc)
+      self.assertEqual(os.listdir(cache_dir),
+                       [os.path.basename(cache_path)])
+
+      # The repaired cache is used without fetching the document again.
+      command._BuildComputeApi(http)
+      self.assertEqual(len(http.requested_urls), 1)
+    finally:
+      FLAGS.fetch_discovery = old_fetch_discovery
+      command_base.DISCOVERY_CACHE_FILE = old_cache_file
+      for name in os.listdir(cache_dir):
+        os.remove(os.path.join(cache_dir, name))
+      os.rmdir(cache_dir)
+
   def testGetZone(self):
     zones = {
         'zone-a': {
@@ -21,6 +21,7 @@ from google.apputils import appcommands
 import gflags as flags
 
 from gcutil import command_base
+from gcutil import utils
 
 
 FLAGS = flags.FLAGS
@@ -40,9 +41,6 @@ class KernelCommand(command_base.GoogleComputeCommand):
 
   resource_collection_name = 'kernels'
 
-  def __init__(self, name, flag_values):
-    super(KernelCommand, self).__init__(name, flag_values)
-
   def SetApi(self, api):
     """Set the Google Compute Engine API for the command.
 
@@ -56,12 +54,15 @@ class KernelCommand(command_base.GoogleComputeCommand):
     self._kernels_api = api.kernels()
 
 
+KernelCommand.summary_fields = utils.InternFields(
+    KernelCommand.summary_fields)
+KernelCommand.detail_fields = utils.InternFields(
+    KernelCommand.detail_fields)
+
+
 class GetKernel(KernelCommand):
   """Get a kernel."""
 
-  def __init__(self, name, flag_values):
-    super(GetKernel, self).__init__(name, flag_values)
-
   def Handle(self, kernel_name):
     """Get the specified kernel.
 
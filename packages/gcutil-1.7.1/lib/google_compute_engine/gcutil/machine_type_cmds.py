@@ -21,6 +21,7 @@ from google.apputils import appcommands
 import gflags as flags
 
 from gcutil import command_base
+from gcutil import utils
 
 
 FLAGS = flags.FLAGS
@@ -52,9 +53,6 @@ class MachineTypeCommand(command_base.GoogleComputeCommand):
 
   resource_collection_name = 'machineTypes'
 
-  def __init__(self, name, flag_values):
-    super(MachineTypeCommand, self).__init__(name, flag_values)
-
   def SetApi(self, api):
     """Set the Google Compute Engine API for the command.
 
@@ -68,12 +66,15 @@ class MachineTypeCommand(command_base.GoogleComputeCommand):
     self._machine_type_api = api.machineTypes()
 
 
+MachineTypeCommand.summary_fields = utils.InternFields(
+    MachineTypeCommand.summary_fields)
+MachineTypeCommand.detail_fields = utils.InternFields(
+    MachineTypeCommand.detail_fields)
+
+
 class GetMachineType(MachineTypeCommand):
   """Get a machine type."""
 
-  def __init__(self, name, flag_values):
-    super(GetMachineType, self).__init__(name, flag_values)
-
   def Handle(self, machine_type_name):
     """Get the specified machine type.
 
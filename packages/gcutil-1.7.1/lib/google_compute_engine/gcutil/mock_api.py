@@ -33,7 +33,7 @@ class CommandExecutor(object):
     self._parameters = unused_kw
     return self
 
-  def execute(self):
+  def execute(self, http=None):  # pylint: disable-msg=W0613
     """Return the stored results for this API call (part 2 of apiclient)."""
     return self._response
 
@@ -51,6 +51,26 @@ class MockRequest(object):
     return self.result_payload
 
 
+class MockBatchHttpRequest(object):
+  """Mock of apiclient.http.BatchHttpRequest that executes serially."""
+
+  def __init__(self, callback=None, batch_uri=None):
+    self._callback = callback
+    self._requests = []
+
+  def add(self, request, callback=None):
+    self._requests.append(request)
+
+  def execute(self, http=None):  # pylint: disable-msg=W0613
+    for i, request in enumerate(self._requests):
+      try:
+        response = request.execute()
+      except Exception as e:  # pylint: disable-msg=W0703
+        self._callback(str(i), None, e)
+      else:
+        self._callback(str(i), response, None)
+
+
 class MockApiBase(object):
   """Base class for all mock APIs."""
 
@@ -18,18 +18,25 @@
 
 import collections
 import datetime
-import json
+import functools
 import os
 import textwrap
 import time
 import uuid
 
+try:
+  # ujson parses and serializes the move logs considerably faster.
+  import ujson as json
+except ImportError:
+  import json
+
 from google.apputils import app
 from google.apputils import appcommands
 import gflags as flags
 
 from gcutil import command_base
 from gcutil import gcutil_logging
+from gcutil import thread_pool
 from gcutil import utils
 from gcutil import version
 
@@ -58,6 +65,10 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
         'Do not delete snapshots that were created for the disks.',
         flag_values=flag_values)
 
+    # Zone and project resources keyed by zone name and ('project',),
+    # respectively, so that each is fetched at most once.
+    self._resource_cache = {}
+
   def SetApi(self, api):
     self._disks_api = api.disks()
     self._instances_api = api.instances()
@@ -79,11 +90,43 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
     if not self._IsUsingAtLeastApiVersion('v1beta14'):
       raise app.UsageError(
           'This command requires using API version v1beta14 or higher.')
-    self._project_resource = self._projects_api.get(
-        project=self._project).execute()
+    self._ValidateFlags()
+
+    dest_zone = self._GetKnownDestinationZone()
+    if dest_zone:
+      # The destination zone is needed later for the quota checks, so
+      # it is fetched alongside the project.
+      self._project_resource = self.ExecuteConcurrently([
+          self._GetProject,
+          functools.partial(self._GetZone, dest_zone)])[0]
+    else:
+      self._project_resource = self._GetProject()
     self.HandleMove(*args, **kwargs)
     print 'The move completed successfully.'
 
+  def _ValidateFlags(self):
+    """Raises a UsageError if there is any problem with the flags."""
+    pass
+
+  def _GetKnownDestinationZone(self):
+    """Returns the destination zone if it is known before HandleMove runs."""
+    return None
+
+  def _GetProject(self, http=None):
+    """Returns the project resource, fetching it only once."""
+    key = ('project',)
+    if key not in self._resource_cache:
+      self._resource_cache[key] = self._projects_api.get(
+          project=self._project).execute(http=http)
+    return self._resource_cache[key]
+
+  def _GetZone(self, zone, http=None):
+    """Returns the resource of the given zone, fetching it only once."""
+    if zone not in self._resource_cache:
+      self._resource_cache[zone] = self._zones_api.get(
+          project=self._project, zone=zone).execute(http=http)
+    return self._resource_cache[zone]
+
   def _Confirm(self, instances_to_mv, instances_to_ignore, disks_to_mv,
                dest_zone):
     """Displays what is about to happen and prompts the user to proceed.
@@ -142,13 +185,13 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
           project=self._project,
           zone=zone,
           instance=instance['name']))
-    results, exceptions = self.ExecuteRequests(
+    results, exceptions = self.ExecuteRequestsInBatches(
         requests, collection_name='instances')
     if exceptions:
       raise command_base.CommandError(
           'Aborting due to errors while deleting instances:\n%s' %
           utils.ListStrings(exceptions))
-    self._CheckForErrorsInOps(self.MakeListResult(results, 'operationList'))
+    self._CheckForErrorsInOps(results)
 
   def _CreateInstances(self, instances, src_zone, dest_zone):
     """Creates the instance resources in the given list in dest_zone.
@@ -172,34 +215,44 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
     ip_addresses = set(self._project_resource.get('externalIpAddresses', []))
     self._SetIps(instances, ip_addresses)
 
+    normalized_dest_zone = self.NormalizeTopLevelResourceName(
+        self._project, 'zones', dest_zone)
+    src_prefix = 'zones/' + src_zone
+    dest_prefix = 'zones/' + dest_zone
+
     requests = []
     for instance in instances:
-      instance['zone'] = self.NormalizeTopLevelResourceName(
-          self._project, 'zones', dest_zone)
+      instance['zone'] = normalized_dest_zone
 
       # Replaces the zones for the persistent disks.
       for disk in instance['disks']:
         if 'source' in disk:
-          disk['source'] = disk['source'].replace(
-              'zones/' + src_zone, 'zones/' + dest_zone)
+          disk['source'] = disk['source'].replace(src_prefix, dest_prefix)
 
       requests.append(self._instances_api.insert(
           project=self._project, body=instance, zone=dest_zone))
-    results, exceptions = self.ExecuteRequests(
+    results, exceptions = self.ExecuteRequestsInBatches(
         requests, collection_name='instances')
     if exceptions:
       raise command_base.CommandError(
           'Aborting due to errors while creating instances:\n%s' %
           utils.ListStrings(exceptions))
-    self._CheckForErrorsInOps(self.MakeListResult(results, 'operationList'))
+    self._CheckForErrorsInOps(results)
 
   def _CheckForErrorsInOps(self, results):
-    """Raises CommandError if any operations in results contains an error."""
-    _, ops = self._PartitionResults(results)
+    """Raises CommandError if any operations in results contains an error.
+
+    Args:
+      results: A list of operations and other resources. Resources that
+        are not operations are ignored.
+    """
     errors = []
-    for op in (ops or []):
-      if 'error' in op and 'errors' in op['error'] and op['error']['errors']:
-        error = op['error']['errors'][0].get('message')
+    for op in results:
+      if not self.IsResultAnOperation(op):
+        continue
+      op_errors = op.get('error', {}).get('errors')
+      if op_errors:
+        error = op_errors[0].get('message')
         if error:
           errors.append(error)
     if errors:
@@ -214,23 +267,72 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
           if 'natIP' in config and config['natIP'] not in ip_addresses:
             config['natIP'] = None
 
-  def _WaitForSnapshots(self, snapshots):
-    """Waits for the given snapshots to be in the READY state."""
-    snapshots = set(snapshots)
+  def _IterReadySnapshots(self, snapshots):
+    """Yields the given snapshots as they become READY or fail.
+
+    A snapshot only counts as ready once it has been listed with a READY
+    status. A snapshot that is no longer listed, or whose status is
+    FAILED, is reported with an error instead, so that its disk is not
+    deleted.
+
+    Args:
+      snapshots: The names of the snapshots to wait for.
+
+    Yields:
+      (name, error) tuples, where error is None if the snapshot is READY
+      and otherwise a message describing why it will never be.
+
+    Raises:
+      CommandError: If the snapshots are not all done within
+        --max_wait_time seconds.
+    """
+    pending = set(snapshots)
     start_sec = time.time()
-    while True:
+    sleep_sec = min(1, self._flags.sleep_between_polls)
+    while pending:
       if time.time() - start_sec > self._flags.max_wait_time:
         raise command_base.CommandError(
             'Timeout reached while waiting for snapshots to be ready.')
 
-      all_snapshots = [
-          s for s in utils.All(self._snapshots_api.list, self._project)['items']
-          if s['name'] in snapshots and s['status'] != 'READY']
-      if not all_snapshots:
+      # Only the snapshots that are still pending are listed, so the
+      # filters and the responses shrink as snapshots become ready.
+      statuses = {}
+      for filter_expression in utils.NameFilterExpressions(pending):
+        for snapshot in utils.IterAll(self._snapshots_api.list,
+                                      self._project,
+                                      filter=filter_expression):
+          if snapshot['name'] in pending:
+            statuses[snapshot['name']] = snapshot['status']
+      for name in sorted(pending):
+        status = statuses.get(name)
+        if status == 'READY':
+          yield name, None
+        elif status is None:
+          yield name, 'Snapshot %s no longer exists.' % name
+        elif status == 'FAILED':
+          yield name, 'Snapshot %s failed.' % name
+        else:
+          continue
+        pending.remove(name)
+      if not pending:
         break
       LOGGER.info('Waiting for snapshots to be READY. Sleeping for %ss' %
-                  self._flags.sleep_between_polls)
-      time.sleep(self._flags.sleep_between_polls)
+                  sleep_sec)
+      time.sleep(sleep_sec)
+      sleep_sec = min(sleep_sec * 2, self._flags.sleep_between_polls)
+
+  def _WaitForSnapshots(self, snapshots):
+    """Waits for the given snapshots to be in the READY state.
+
+    Raises:
+      CommandError: If any of the snapshots will never be READY.
+    """
+    errors = [error for _, error in self._IterReadySnapshots(snapshots)
+              if error]
+    if errors:
+      raise command_base.CommandError(
+          'Aborting due to errors while creating snapshots:\n%s' %
+          utils.ListStrings(errors))
 
   def _CreateSnapshots(self, snapshot_mappings, src_zone, dest_zone):
     """Creates snapshots for the disks to be moved.
@@ -245,26 +347,133 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
     if not snapshot_mappings:
       return
 
+    self._InsertSnapshots(snapshot_mappings, src_zone, dest_zone)
+    self._WaitForSnapshots(snapshot_mappings.values())
+
+  def _InsertSnapshots(self, snapshot_mappings, src_zone, dest_zone):
+    """Starts the creation of snapshots for the disks to be moved.
+
+    Unlike _CreateSnapshots, this does not wait for the snapshots to
+    be READY.
+
+    Args:
+      snapshot_mappings: A map of disk names that should be moved to
+        the names that should be used for each disk's snapshot.
+      src_zone: The source zone. All disks in snapshot_mappings must be
+        in this zone.
+      dest_zone: The zone the disks are destined for.
+    """
     print 'Snapshotting disks...'
+    # All of the disks share the URL prefix of the source zone's disks
+    # collection, so it is only built once.
+    disks_prefix = self.NormalizePerZoneResourceName(
+        self._project, src_zone, 'disks', '')
     requests = []
     for disk_name, snapshot_name in snapshot_mappings.iteritems():
       snapshot_resource = {
           'name': snapshot_name,
-          'sourceDisk': self.NormalizePerZoneResourceName(
-              self._project, src_zone, 'disks', disk_name),
+          'sourceDisk': disks_prefix + disk_name,
           'description': ('Snapshot for moving disk %s from %s to %s.' %
                           (disk_name, src_zone, dest_zone))}
       requests.append(self._snapshots_api.insert(
           project=self._project, body=snapshot_resource))
 
-    results, exceptions = self.ExecuteRequests(
+    results, exceptions = self.ExecuteRequestsInBatches(
         requests, collection_name='snapshots')
     if exceptions:
       raise command_base.CommandError(
           'Aborting due to errors while creating snapshots:\n%s' %
           utils.ListStrings(exceptions))
-    self._CheckForErrorsInOps(self.MakeListResult(results, 'operationList'))
-    self._WaitForSnapshots(snapshot_mappings.values())
+    self._CheckForErrorsInOps(results)
+
+  def _MoveDisks(self, snapshot_mappings, src_zone, dest_zone):
+    """Moves disks to dest_zone by way of snapshots.
+
+    Each disk is deleted and recreated as soon as its own snapshot is
+    READY instead of waiting for all of the snapshots, so the slowest
+    snapshot does not hold back the other disks.
+
+    Args:
+      snapshot_mappings: A map of disk names that should be moved to
+        the names that should be used for each disk's snapshot.
+      src_zone: The source zone. All disks in snapshot_mappings must be
+        in this zone.
+      dest_zone: The zone the disks are destined for.
+
+    Raises:
+      CommandError: If one or more of the disks could not be moved.
+    """
+    if not snapshot_mappings:
+      return
+
+    self._InsertSnapshots(snapshot_mappings, src_zone, dest_zone)
+
+    print 'Moving disks as their snapshots become ready...'
+    disk_names = dict((snapshot_name, disk_name) for disk_name, snapshot_name
+                      in snapshot_mappings.iteritems())
+    tp = thread_pool.ThreadPool(self._flags.concurrent_operations)
+    ops = []
+    exceptions = []
+    try:
+      for snapshot_name, error in self._IterReadySnapshots(
+          snapshot_mappings.values()):
+        if error:
+          exceptions.append(command_base.CommandError(
+              '%s Disk %s was not moved.' % (error,
+                                             disk_names[snapshot_name])))
+          continue
+        op = command_base.CallThreadPoolOperation(
+            functools.partial(self._MoveDisk, disk_names[snapshot_name],
+                              snapshot_name, src_zone, dest_zone),
+            self)
+        ops.append(op)
+        tp.Add(op)
+    finally:
+      tp.WaitShutdown()
+
+    exceptions.extend(op.Result() for op in ops if op.RaisedException())
+    if exceptions:
+      raise command_base.CommandError(
+          'Aborting due to errors while moving disks:\n%s' %
+          utils.ListStrings(exceptions))
+
+  def _MoveDisk(self, disk_name, snapshot_name, src_zone, dest_zone,
+                http=None):
+    """Deletes a disk and recreates it in dest_zone from its snapshot.
+
+    Args:
+      disk_name: The name of the disk to move.
+      snapshot_name: The name of the READY snapshot of the disk.
+      src_zone: The zone to which the disk belongs.
+      dest_zone: The zone in which the disk will be recreated.
+      http: The httplib2.Http object to use for the requests.
+
+    Raises:
+      CommandError: If the deletion or the insertion fails.
+    """
+    self._ExecuteAndCheck(
+        self._disks_api.delete(
+            project=self._project, disk=disk_name, zone=src_zone),
+        'disks', http)
+    disk_resource = {
+        'name': disk_name,
+        'sourceSnapshot': self.NormalizeGlobalResourceName(
+            self._project, 'snapshots', snapshot_name)}
+    self._ExecuteAndCheck(
+        self._disks_api.insert(
+            project=self._project, body=disk_resource, zone=dest_zone),
+        'disks', http)
+
+  def _ExecuteAndCheck(self, request, collection_name, http):
+    """Executes a single request and checks its operation for errors."""
+    result = request.execute(http=http)
+    if self._flags.synchronous_mode:
+      result = self.WaitForOperation(
+          self._flags, time, result, http=http,
+          collection_name=collection_name)
+    if not isinstance(result, list):
+      result = [result]
+    self._CheckForErrorsInOps(result)
 
   def _DeleteSnapshots(self, snapshot_names, zone):
     """Deletes the given snapshots.
@@ -282,13 +491,13 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
       requests.append(self._snapshots_api.delete(
           project=self._project, snapshot=name))
 
-    results, exceptions = self.ExecuteRequests(
+    results, exceptions = self.ExecuteRequestsInBatches(
         requests, collection_name='snapshots')
     if exceptions:
       raise command_base.CommandError(
           'Aborting due to errors while deleting snapshots:\n%s' %
           utils.ListStrings(exceptions))
-    self._CheckForErrorsInOps(self.MakeListResult(results, 'operationList'))
+    self._CheckForErrorsInOps(results)
 
   def _CreateDisksFromSnapshots(self, snapshot_mappings, dest_zone):
     """Creates disks in the destination zone from the given snapshots.
@@ -313,13 +522,13 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
       requests.append(self._disks_api.insert(
           project=self._project, body=disk_resource, zone=dest_zone))
 
-    results, exceptions = self.ExecuteRequests(
+    results, exceptions = self.ExecuteRequestsInBatches(
         requests, collection_name='disks')
     if exceptions:
       raise command_base.CommandError(
           'Aborting due to errors while re-creating disks:\n%s' %
           utils.ListStrings(exceptions))
-    self._CheckForErrorsInOps(self.MakeListResult(results, 'operationList'))
+    self._CheckForErrorsInOps(results)
 
   def _DeleteDisks(self, disk_names, zone):
     """Deletes the given disks.
@@ -337,31 +546,50 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
       requests.append(self._disks_api.delete(
           project=self._project, disk=name, zone=zone))
 
-    results, exceptions = self.ExecuteRequests(
+    results, exceptions = self.ExecuteRequestsInBatches(
         requests, collection_name='disks')
     if exceptions:
       raise command_base.CommandError(
           'Aborting due to errors while deleting disks:\n%s' %
           utils.ListStrings(exceptions))
-    self._CheckForErrorsInOps(self.MakeListResult(results, 'operationList'))
+    self._CheckForErrorsInOps(results)
 
   def _CalculateNumCpus(self, instances_to_mv):
     """Calculates the amount of CPUs used by the given instances."""
-    machines = utils.All(
-        self._machine_type_api.list,
-        self._project)['items']
-    num_cpus = dict((m['selfLink'], m['guestCpus']) for m in machines)
-    return sum(float(num_cpus[i['machineType']]) for i in instances_to_mv)
+    # Only the machine types that are in use by the instances are
+    # fetched, so the cost does not grow with the size of the project.
+    machine_type_names = set(
+        self.DenormalizeResourceName(i['machineType'])
+        for i in instances_to_mv)
+    requests = []
+    for name in machine_type_names:
+      requests.append(self._machine_type_api.get(
+          project=self._project, machineType=name))
+    results, exceptions = self.ExecuteRequests(
+        requests, collection_name='machineTypes')
+    if exceptions:
+      raise command_base.CommandError(
+          'Aborting due to errors while fetching machine types:\n%s' %
+          utils.ListStrings(exceptions))
+
+    num_cpus = dict((m['name'], m['guestCpus']) for m in results)
+    return sum(float(num_cpus[self.DenormalizeResourceName(i['machineType'])])
+               for i in instances_to_mv)
 
   def _CalculateTotalDisksSizeGb(self, disk_names, zone):
     """Calculates the total size of the given disks."""
     disk_names = set(disk_names)
-    disks = utils.All(
+    if not disk_names:
+      return 0
+
+    # Lets the server do the filtering so only the disks being moved
+    # are transferred.
+    disks = utils.IterAll(
         self._disks_api.list,
         self._project,
-        zone=zone)['items']
-    disk_sizes = [float(d['sizeGb']) for d in disks if d['name'] in disk_names]
-    return sum(disk_sizes)
+        filter=utils.RegexesToFilterExpression(sorted(disk_names)),
+        zone=zone)
+    return sum(float(d['sizeGb']) for d in disks if d['name'] in disk_names)
 
   def _CreateQuotaRequirementsDict(self, instances_to_mv, disks_to_mv,
                                    src_zone, snapshots_to_create=None):
@@ -380,8 +608,7 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
     """Raises a CommandError if the quota to perform the move does not exist."""
     print 'Checking project and destination zone quotas...'
 
-    dest_zone_resource = self._zones_api.get(
-        project=self._project, zone=dest_zone).execute()
+    dest_zone_resource = self._GetZone(dest_zone)
     requirements = self._CreateQuotaRequirementsDict(
         instances_to_mv, disks_to_mv, src_zone,
         snapshots_to_create=snapshots_to_create)
@@ -412,25 +639,22 @@ class MoveInstancesBase(command_base.GoogleComputeCommand):
       A mapping of available quota for INSTANCES, CPUS, DISKS, DISKS_TOTAL_GB,
       and SNAPSHOTS. The value can be negative if enough quota does not exist.
     """
-    pertinent_resources = set(requirements.keys())
-    available = {}
-
-    for quota in project_quota:
-      metric = quota.get('metric')
-      if metric in pertinent_resources:
-        available[metric] = quota.get('limit') - quota.get('usage')
-        # For existing resources that are to be moved (i.e.,
-        # everything in requirements except snapshots since they do
-        # not exist yet) since they do not exist yet) we must count
-        # them into the available number since they will be deleted
-        # shortly.
-        if metric != 'SNAPSHOTS':
-          available[metric] += requirements[metric]
+    # For existing resources that are to be moved (i.e., everything in
+    # requirements except snapshots since they do not exist yet) we
+    # must count them into the available number since they will be
+    # deleted shortly.
+    available = dict(
+        (quota['metric'],
+         quota.get('limit') - quota.get('usage') +
+         (requirements[quota['metric']]
+          if quota['metric'] != 'SNAPSHOTS' else 0))
+        for quota in project_quota
+        if quota.get('metric') in requirements)
 
     for quota in zone_quota:
       metric = quota.get('metric')
-      if metric in pertinent_resources:
-        available[metric] = min(available[metric],
+      if metric in requirements:
+        available[metric] = min(available.get(metric, float('inf')),
                                 quota.get('limit') - quota.get('usage'))
 
     return available
@@ -491,6 +715,9 @@ class MoveInstances(MoveInstancesBase):
     if self._flags.source_zone == self._flags.destination_zone:
       raise app.UsageError('The destination and source zones cannot be equal.')
 
+  def _GetKnownDestinationZone(self):
+    return self.DenormalizeResourceName(self._flags.destination_zone)
+
   def HandleMove(self, *instance_regexes):
     """Handles the actual move.
 
@@ -498,8 +725,6 @@ class MoveInstances(MoveInstancesBase):
       *instance_regexes: The sequence of name regular expressions used
         for filtering.
     """
-    self._ValidateFlags()
-
     if not instance_regexes:
       raise app.UsageError(
           'You must specify at least one regex for instances to move.')
@@ -510,28 +735,36 @@ class MoveInstances(MoveInstancesBase):
 
     print 'Retrieving instances in %s matching: %s...' % (
         self._flags.source_zone, ' '.join(instance_regexes))
-    instances_to_mv = utils.All(
-        self._instances_api.list,
-        self._project,
-        filter=utils.RegexesToFilterExpression(instance_regexes),
-        zone=self._flags.source_zone)['items']
-    instances_in_dest = utils.All(
-        self._instances_api.list,
-        self._project,
-        filter=utils.RegexesToFilterExpression(instance_regexes),
-        zone=self._flags.destination_zone)['items']
+    # The two listings are independent of each other, so they are
+    # issued concurrently.
+    instances_to_mv, instances_in_dest = [
+        res['items'] for res in self.ExecuteConcurrently([
+            functools.partial(
+                utils.All,
+                self._instances_api.list,
+                self._project,
+                filter=utils.RegexesToFilterExpression(instance_regexes),
+                zone=self._flags.source_zone),
+            functools.partial(
+                utils.All,
+                self._instances_api.list,
+                self._project,
+                filter=utils.RegexesToFilterExpression(instance_regexes),
+                zone=self._flags.destination_zone)])]
 
     self._CheckInstancePreconditions(instances_to_mv, instances_in_dest)
 
-    instances_to_ignore = utils.All(
-        self._instances_api.list,
-        self._project,
-        filter=utils.RegexesToFilterExpression(instance_regexes, op='ne'),
-        zone=self._flags.source_zone)['items']
-
-    print 'Checking disk preconditions...'
     disks_to_mv = self._GetPersistentDiskNames(instances_to_mv)
-    self._CheckDiskPreconditions(instances_to_ignore, disks_to_mv)
+    if disks_to_mv:
+      # The other instances in the source zone only matter if they
+      # could be using the disks that are about to be moved.
+      print 'Checking disk preconditions...'
+      instances_to_ignore = utils.IterAll(
+          self._instances_api.list,
+          self._project,
+          filter=utils.RegexesToFilterExpression(instance_regexes, op='ne'),
+          zone=self._flags.source_zone)
+      self._CheckDiskPreconditions(instances_to_ignore, disks_to_mv)
     # At this point, all disks in use by instances_to_mv are only
     # attached to instances in the set instances_to_mv.
 
@@ -552,12 +785,9 @@ class MoveInstances(MoveInstancesBase):
     # Assuming no other processes have modified the user's project, at
     # this point, we can assume that all disks-to-be-moved are
     # dormant.
-    self._CreateSnapshots(snapshot_mappings,
-                          self._flags.source_zone,
-                          self._flags.destination_zone)
-    self._DeleteDisks(disks_to_mv, self._flags.source_zone)
-    self._CreateDisksFromSnapshots(snapshot_mappings,
-                                   self._flags.destination_zone)
+    self._MoveDisks(snapshot_mappings,
+                    self._flags.source_zone,
+                    self._flags.destination_zone)
     self._CreateInstances(instances_to_mv,
                           self._flags.source_zone,
                           self._flags.destination_zone)
@@ -571,11 +801,11 @@ class MoveInstances(MoveInstancesBase):
   def _GenerateSnapshotNames(self, disk_names):
     """Returns a dict mapping each disk name to a random UUID.
 
-    The UUID will be used as the disk's snapshot name. UUID's are
-    valid Compute resource names. Further, UUID collisions are
-    improbable, so using them is a great way for generating resource
-    names (e.g., we avoid network communication to check if the name
-    we choose already exists).
+    The hex form of the UUID will be used as the disk's snapshot name.
+    UUID's are valid Compute resource names. Further, UUID collisions
+    are improbable, so using them is a great way for generating
+    resource names (e.g., we avoid network communication to check if
+    the name we choose already exists).
 
     Args:
       disk_names: A list of disk_names for which snapshot names
@@ -584,7 +814,7 @@ class MoveInstances(MoveInstancesBase):
     Returns:
       A dict with the mapping.
     """
-    return dict((name, 'snapshot-' + str(uuid.uuid4())) for name in disk_names)
+    return dict((name, 'snapshot-' + uuid.uuid4().hex) for name in disk_names)
 
   def _CheckInstancePreconditions(self, instances_to_mv, instances_in_dest):
     if not instances_to_mv:
@@ -633,45 +863,47 @@ class MoveInstances(MoveInstancesBase):
       name and the second element is a list of disks attached to that
       instance.
     """
-    res = {}
+    res = collections.defaultdict(list)
     disk_names = set(disk_names)
     for instance in instances:
       instance_name = instance['name']
-      for disk in instance.get('disks', []):
-        if disk['type'] != 'PERSISTENT':
-          continue
-        disk_name = disk['source'].split('/')[-1]
-        if disk_name in disk_names:
-          if instance_name not in res:
-            res[instance_name] = []
-          res[instance_name].append(disk_name)
+      for disk in instance.get('disks', ()):
+        if disk['type'] == 'PERSISTENT':
+          disk_name = disk['source'].rpartition('/')[2]
+          if disk_name in disk_names:
+            res[instance_name].append(disk_name)
     return sorted(res.iteritems())
 
   def _GetPersistentDiskNames(self, instances):
     res = []
     for instance in instances:
-      for disk in instance.get('disks', []):
+      for disk in instance.get('disks', ()):
         if disk['type'] == 'PERSISTENT':
-          res.append(disk['source'].split('/')[-1])
+          res.append(disk['source'].rpartition('/')[2])
     return res
 
   def _CheckDestinationZone(self):
     """Raises an exception if the destination zone is not valid."""
     print 'Checking destination zone...'
-    self._zones_api.get(project=self._project,
-                        zone=self._flags.destination_zone).execute()
+    self._GetZone(self._flags.destination_zone)
 
   def _WriteLog(self, log_path, instances_to_mv, snapshot_mappings):
     """Logs the instances that will be moved and the destination zone."""
     print 'If the move fails, you can re-attempt it using:'
     print '  gcutil resumemove %s' % log_path
-    with open(log_path, 'w') as f:
-      contents = {'version': version.__version__,
-                  'dest_zone': self._flags.destination_zone,
-                  'src_zone': self._flags.source_zone,
-                  'instances': instances_to_mv,
-                  'snapshot_mappings': snapshot_mappings}
-      json.dump(contents, f)
+    contents = {'version': version.__version__,
+                'dest_zone': self._flags.destination_zone,
+                'src_zone': self._flags.source_zone,
+                'instances': instances_to_mv,
+                'snapshot_mappings': snapshot_mappings}
+    payload = json.dumps(contents)
+
+    # The log is written to a sibling file and renamed into place, so
+    # a crash mid-write cannot leave a truncated log behind.
+    tmp_path = log_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+      f.write(payload)
+    os.rename(tmp_path, log_path)
 
   def _GenerateLogPath(self):
     """Generates a file path in the form ~/.gcutil.move.YYmmddHHMMSS."""
@@ -704,13 +936,13 @@ class ResumeMove(MoveInstancesBase):
 
   def _Intersect(self, resources1, resources2):
     """set(resources1) & set(resources2) based on the name field."""
-    names1 = set(r['name'] for r in resources1)
-    return [r for r in resources2 if r['name'] in names1]
+    in_names1 = set(r['name'] for r in resources1).__contains__
+    return [r for r in resources2 if in_names1(r['name'])]
 
   def _Subtract(self, resources1, resources2):
     """set(resources1) - set(resources2) based on the name field."""
-    names2 = set(r['name'] for r in resources2)
-    return [r for r in resources1 if r['name'] not in names2]
+    in_names2 = set(r['name'] for r in resources2).__contains__
+    return [r for r in resources1 if not in_names2(r['name'])]
 
   def _GetKey(self, log, key):
     """Returns log[key] or raises a CommandError if key does not exist."""
@@ -752,11 +984,27 @@ class ResumeMove(MoveInstancesBase):
 
     snapshot_mappings = self._GetKey(log, 'snapshot_mappings')
     instances_to_mv = self._GetKey(log, 'instances')
-
-    instances_in_dest = utils.All(
-        self._instances_api.list, self._project, zone=dest_zone)['items']
-    instances_in_source = utils.All(
-        self._instances_api.list, self._project, zone=src_zone)['items']
+    disk_names = snapshot_mappings.keys()
+    snapshot_names = snapshot_mappings.values()
+
+    # None of these listings depend on each other, so they are issued
+    # concurrently.
+    (instances_in_dest, instances_in_source,
+     disks_in_dest, disks_in_src) = self.ExecuteConcurrently([
+         functools.partial(
+             utils.All, self._instances_api.list, self._project,
+             zone=dest_zone),
+         functools.partial(
+             utils.All, self._instances_api.list, self._project,
+             zone=src_zone),
+         functools.partial(
+             utils.NamesExist, self._disks_api.list, self._project,
+             disk_names, zone=dest_zone),
+         functools.partial(
+             utils.NamesExist, self._disks_api.list, self._project,
+             disk_names, zone=src_zone)])
+    instances_in_dest = instances_in_dest['items']
+    instances_in_source = instances_in_source['items']
 
     # Note that we cannot use normal set intersection and subtraction
     # because two different instance resources could be referring to
@@ -770,12 +1018,7 @@ class ResumeMove(MoveInstancesBase):
           'All instances are already in %s.' % dest_zone)
 
     # Figures out which disks have not been moved.
-    disks_in_dest = set(utils.AllNames(
-        self._disks_api.list, self._project, zone=dest_zone))
-    disks_in_src = set(utils.AllNames(
-        self._disks_api.list, self._project, zone=src_zone))
-
-    disks_to_mv = set(snapshot_mappings.keys()) & disks_in_src
+    disks_to_mv = disks_in_src.intersection(disk_names)
 
     instances_to_delete = self._Intersect(instances_to_mv, instances_in_source)
 
@@ -783,8 +1026,8 @@ class ResumeMove(MoveInstancesBase):
     # which ones still need to be snapshotted before being deleted.
     snapshot_mappings_for_unmoved_disks = {}
     if disks_to_mv:
-      current_snapshots = utils.AllNames(
-          self._snapshots_api.list, self._project)
+      current_snapshots = utils.NamesExist(
+          self._snapshots_api.list, self._project, snapshot_names)
 
       for disk, snapshot in snapshot_mappings.iteritems():
         if disk in disks_to_mv and snapshot not in current_snapshots:
@@ -803,12 +1046,11 @@ class ResumeMove(MoveInstancesBase):
     self._DeleteDisks(disks_to_mv, src_zone)
 
     # Create disks in destination zone from snapshots.
-    all_snapshots = set(utils.AllNames(
-        self._snapshots_api.list, self._project))
-    disks_to_create = {}
-    for disk, snapshot in snapshot_mappings.iteritems():
-      if snapshot in all_snapshots and disk not in disks_in_dest:
-        disks_to_create[disk] = snapshot
+    all_snapshots = utils.NamesExist(
+        self._snapshots_api.list, self._project, snapshot_names)
+    disks_to_create = dict(
+        (disk, snapshot) for disk, snapshot in snapshot_mappings.iteritems()
+        if snapshot in all_snapshots and disk not in disks_in_dest)
     self._CreateDisksFromSnapshots(disks_to_create, dest_zone)
 
     self._CreateInstances(instances_to_mv, src_zone, dest_zone)
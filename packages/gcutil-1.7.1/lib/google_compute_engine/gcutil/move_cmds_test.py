@@ -22,6 +22,10 @@ import path_initializer
 path_initializer.InitializeSysPath()
 
 import copy
+import json
+import os
+import shutil
+import tempfile
 import uuid
 
 from google.apputils import app
@@ -111,6 +115,202 @@ class MoveInstancesBaseTest(MoveInstancesBaseTestCase):
     self.assertEqual(self.command._ExtractAvailableQuota(
         project_quota, zone_quota, requirements), expected)
 
+  def testCheckForErrorsInOps(self):
+    ok_op = {'kind': 'compute#operation', 'name': 'op-1'}
+    failed_op = {'kind': 'compute#operation', 'name': 'op-2',
+                 'error': {'errors': [{'message': 'Disk not found.'}]}}
+    resource = {'kind': 'compute#disk', 'name': 'disk-1',
+                'error': {'errors': [{'message': 'Not an operation.'}]}}
+
+    self.command._CheckForErrorsInOps([])
+    self.command._CheckForErrorsInOps([ok_op, resource])
+    self.assertRaises(command_base.CommandError,
+                      self.command._CheckForErrorsInOps,
+                      [ok_op, failed_op, resource])
+
+  def testCalculateNumCpus(self):
+    guest_cpus = {'n1-standard-1': 1, 'n1-standard-4': 4}
+    requested = []
+
+    class MockMachineTypesApi(object):
+
+      def get(self, project=None, machineType=None):
+        requested.append(machineType)
+        return mock_api.MockRequest(
+            {'name': machineType, 'guestCpus': guest_cpus[machineType]})
+
+    self.command._machine_type_api = MockMachineTypesApi()
+    self.command._credential = mock_api.MockCredential()
+    self.flag_values.project = 'my-project'
+
+    instances = [
+        {'machineType': 'https://googleapis.com/.../n1-standard-1'},
+        {'machineType': 'https://googleapis.com/.../n1-standard-4'},
+        {'machineType': 'https://googleapis.com/.../n1-standard-4'}]
+    self.assertEqual(self.command._CalculateNumCpus(instances), 9.0)
+    self.assertEqual(sorted(requested), ['n1-standard-1', 'n1-standard-4'])
+
+  def testGetZoneAndProjectAreCached(self):
+    requested = []
+
+    class MockZonesApi(object):
+
+      def get(self, project=None, zone=None):
+        requested.append(zone)
+        return mock_api.MockRequest({'name': zone})
+
+    class MockProjectsApi(object):
+
+      def get(self, project=None):
+        requested.append(project)
+        return mock_api.MockRequest({'name': project})
+
+    self.command._zones_api = MockZonesApi()
+    self.command._projects_api = MockProjectsApi()
+    self.flag_values.project = 'my-project'
+    self.command._project = 'my-project'
+
+    for _ in xrange(3):
+      self.assertEqual(self.command._GetZone('zone-a'), {'name': 'zone-a'})
+      self.assertEqual(self.command._GetZone('zone-b'), {'name': 'zone-b'})
+      self.assertEqual(self.command._GetProject(), {'name': 'my-project'})
+    self.assertEqual(requested, ['zone-a', 'zone-b', 'my-project'])
+
+  def _MockSnapshotStatuses(self, polls):
+    """Makes the snapshots list calls return the given statuses.
+
+    Args:
+      polls: A list with, for each poll, a dict mapping snapshot names to
+        their status.
+
+    Returns:
+      A tuple of the list of filters requested for each poll and the
+      list of sleep durations.
+    """
+    filters = []
+    sleeps = []
+
+    def MockList(project=None, maxResults=None, filter=None,
+                 pageToken=None):
+      names = filter[len('name eq '):].split('|')
+      statuses = polls[len(sleeps)]
+      if len(filters) == len(sleeps):
+        filters.append([])
+      filters[-1].append(filter)
+      return mock_api.MockRequest(
+          {'items': [{'name': name, 'status': statuses[name]}
+                     for name in names if name in statuses]})
+
+    class MockTime(object):
+
+      def time(self):
+        return 0
+
+      def sleep(self, sleep_sec):
+        sleeps.append(sleep_sec)
+
+    self.command._snapshots_api.list = MockList
+    old_time = move_cmds.time
+    move_cmds.time = MockTime()
+    self.addCleanup(setattr, move_cmds, 'time', old_time)
+    return filters, sleeps
+
+  def testIterReadySnapshots(self):
+    self.flag_values.sleep_between_polls = 2
+    filters, sleeps = self._MockSnapshotStatuses([
+        {'snap-a': 'CREATING', 'snap-b': 'READY', 'snap-c': 'CREATING'},
+        {'snap-a': 'CREATING', 'snap-c': 'READY'},
+        {'snap-a': 'READY'}])
+    old_max_name_filter_length = move_cmds.utils.MAX_NAME_FILTER_LENGTH
+    move_cmds.utils.MAX_NAME_FILTER_LENGTH = 14
+    try:
+      ready = list(self.command._IterReadySnapshots(
+          ['snap-a', 'snap-b', 'snap-c']))
+    finally:
+      move_cmds.utils.MAX_NAME_FILTER_LENGTH = old_max_name_filter_length
+    self.assertEqual(ready, [('snap-b', None), ('snap-c', None),
+                             ('snap-a', None)])
+    self.assertEqual(filters, [['name eq snap-a|snap-b', 'name eq snap-c'],
+                               ['name eq snap-a|snap-c'],
+                               ['name eq snap-a']])
+    self.assertEqual(sleeps, [1, 2])
+
+  def testIterReadySnapshotsReportsMissingAndFailedSnapshots(self):
+    filters, sleeps = self._MockSnapshotStatuses([
+        {'snap-a': 'CREATING', 'snap-b': 'FAILED', 'snap-c': 'CREATING'},
+        {'snap-c': 'READY'}])
+    ready = list(self.command._IterReadySnapshots(
+        ['snap-a', 'snap-b', 'snap-c']))
+    self.assertEqual(ready, [('snap-b', 'Snapshot snap-b failed.'),
+                             ('snap-a', 'Snapshot snap-a no longer exists.'),
+                             ('snap-c', None)])
+    self.assertEqual(len(sleeps), 1)
+
+  def testWaitForSnapshotsFailsForMissingSnapshots(self):
+    self._MockSnapshotStatuses([{'snap-a': 'READY'}])
+    self.assertRaises(command_base.CommandError,
+                      self.command._WaitForSnapshots, ['snap-a', 'snap-b'])
+
+  def testMoveDisks(self):
+    moved = []
+
+    def MockInsertSnapshots(snapshot_mappings, src_zone, dest_zone):
+      pass
+
+    def MockIterReadySnapshots(snapshots):
+      # The disk for a ready snapshot is moved before the remaining
+      # snapshots are reported as ready.
+      yield 'snapshot-b', None
+      yield 'snapshot-a', None
+
+    def MockMoveDisk(disk_name, snapshot_name, src_zone, dest_zone,
+                     http=None):
+      moved.append((disk_name, snapshot_name, src_zone, dest_zone))
+
+    self.command._InsertSnapshots = MockInsertSnapshots
+    self.command._IterReadySnapshots = MockIterReadySnapshots
+    self.command._MoveDisk = MockMoveDisk
+    self.command._credential = mock_api.MockCredential()
+
+    self.command._MoveDisks({'disk-a': 'snapshot-a', 'disk-b': 'snapshot-b'},
+                            'src-zone', 'dest-zone')
+    self.assertEqual(
+        sorted(moved),
+        [('disk-a', 'snapshot-a', 'src-zone', 'dest-zone'),
+         ('disk-b', 'snapshot-b', 'src-zone', 'dest-zone')])
+
+    def MockFailingMoveDisk(disk_name, snapshot_name, src_zone, dest_zone,
+                            http=None):
+      raise command_base.CommandError('failed to move %s' % disk_name)
+
+    self.command._MoveDisk = MockFailingMoveDisk
+    self.assertRaises(
+        command_base.CommandError, self.command._MoveDisks,
+        {'disk-a': 'snapshot-a', 'disk-b': 'snapshot-b'},
+        'src-zone', 'dest-zone')
+
+  def testMoveDisksKeepsDisksWithMissingSnapshots(self):
+    moved = []
+
+    def MockIterReadySnapshots(snapshots):
+      yield 'snapshot-a', 'Snapshot snapshot-a no longer exists.'
+      yield 'snapshot-b', None
+
+    def MockMoveDisk(disk_name, snapshot_name, src_zone, dest_zone,
+                     http=None):
+      moved.append(disk_name)
+
+    self.command._InsertSnapshots = lambda *args: None
+    self.command._IterReadySnapshots = MockIterReadySnapshots
+    self.command._MoveDisk = MockMoveDisk
+    self.command._credential = mock_api.MockCredential()
+
+    self.assertRaises(
+        command_base.CommandError, self.command._MoveDisks,
+        {'disk-a': 'snapshot-a', 'disk-b': 'snapshot-b'},
+        'src-zone', 'dest-zone')
+    self.assertEqual(moved, ['disk-b'])
+
 
 class MoveInstancesTest(MoveInstancesBaseTestCase):
 
@@ -155,61 +355,94 @@ class MoveInstancesTest(MoveInstancesBaseTestCase):
       for val in res.values():
         self.assertTrue(isinstance(val, basestring))
         self.assertTrue(val.startswith('snapshot-'))
+        self.assertEqual(len(val), len('snapshot-') + 32)
         try:
           uuid.UUID(val[len('snapshot-'):])
         except ValueError:
           self.fail('Value generated does not include valid UUID.')
 
-  def _GenerateInstanceResources(self, num, prefix='instance'):
-    template = {
-        'status': 'RUNNING',
-        'kind': 'compute#instance',
-        'machineType': 'https://googleapis.com/compute/.../n1-standard-1',
-        'zone': 'https://googleapis.com/compute/.../zones/my-zone',
-        'tags': [],
-        'image': 'https://googleapis.com/compute/.../images/gcel',
-        'disks': [
-            {
-                'index': 0,
-                'kind': 'compute#instanceDisk',
-                'type': 'EPHEMERAL',
-                'mode': 'READ_WRITE'
-                },
-            {
-                'index': 1,
-                'kind': 'compute#attachedDisk',
-                'mode': 'READ_ONLY',
-                'type': 'PERSISTENT'
-                }
-            ],
-        'networkInterfaces': [
-            {
-                'networkIP': '10.211.197.175',
-                'kind': 'compute#instanceNetworkInterface',
-                'accessConfigs': [
-                    {
-                        'type': 'ONE_TO_ONE_NAT',
-                        'name': 'External NAT',
-                        'natIP': '173.255.120.98'
-                        }
-                    ],
-                'name': 'nic0',
-                'network': 'https://googleapis.com/compute/.../networks/default'
-                }
-            ],
-        'id': '12884714477555140369'}
-
-    res = []
-    for i in xrange(num):
-      instance = copy.deepcopy(template)
-      instance['name'] = '%s-%s' % (prefix, i)
-      instance['selfLink'] = (
-          'https://googleapis.com/compute/.../instances/%s' % instance['name'])
-      instance['disks'][1]['deviceName'] = instance['name']
-      instance['disks'][1]['source'] = (
-          'https://www.googleapis.com/compute/.../disks/%s' % instance['name'])
-      res.append(instance)
-    return res
+  def testWriteLog(self):
+    self.flag_values.source_zone = 'src-zone'
+    self.flag_values.destination_zone = 'dest-zone'
+    log_dir = tempfile.mkdtemp()
+    try:
+      log_path = os.path.join(log_dir, '.gcutil.move.20130101000000')
+      self.command._WriteLog(log_path, [{'name': 'instance-0'}],
+                             {'disk-0': 'snapshot-0'})
+      self.assertEqual(os.listdir(log_dir), [os.path.basename(log_path)])
+      with open(log_path) as f:
+        log = json.load(f)
+      self.assertEqual(log['src_zone'], 'src-zone')
+      self.assertEqual(log['dest_zone'], 'dest-zone')
+      self.assertEqual(log['instances'], [{'name': 'instance-0'}])
+      self.assertEqual(log['snapshot_mappings'], {'disk-0': 'snapshot-0'})
+    finally:
+      shutil.rmtree(log_dir)
+
+  # Serialized once so that each generated instance can be built with
+  # json.loads, which is much cheaper than copy.deepcopy.
+  _INSTANCE_TEMPLATE_JSON = json.dumps({
+      'status': 'RUNNING',
+      'kind': 'compute#instance',
+      'machineType': 'https://googleapis.com/compute/.../n1-standard-1',
+      'zone': 'https://googleapis.com/compute/.../zones/my-zone',
+      'tags': [],
+      'image': 'https://googleapis.com/compute/.../images/gcel',
+      'disks': [
+          {
+              'index': 0,
+              'kind': 'compute#instanceDisk',
+              'type': 'EPHEMERAL',
+              'mode': 'READ_WRITE'
+              },
+          {
+              'index': 1,
+              'kind': 'compute#attachedDisk',
+              'mode': 'READ_ONLY',
+              'type': 'PERSISTENT'
+              }
+          ],
+      'networkInterfaces': [
+          {
+              'networkIP': '10.211.197.175',
+              'kind': 'compute#instanceNetworkInterface',
+              'accessConfigs': [
+                  {
+                      'type': 'ONE_TO_ONE_NAT',
+                      'name': 'External NAT',
+                      'natIP': '173.255.120.98'
+                      }
+                  ],
+              'name': 'nic0',
+              'network': 'https://googleapis.com/compute/.../networks/default'
+              }
+          ],
+      'id': '12884714477555140369'})
+
+  # The generated resources are built once per (num, prefix) pair and
+  # shared across test methods.
+  _instance_resources_cache = {}
+
+  @classmethod
+  def _GenerateInstanceResources(cls, num, prefix='instance'):
+    key = (num, prefix)
+    res = cls._instance_resources_cache.get(key)
+    if res is None:
+      res = []
+      for i in xrange(num):
+        instance = json.loads(cls._INSTANCE_TEMPLATE_JSON)
+        instance['name'] = '%s-%s' % (prefix, i)
+        instance['selfLink'] = (
+            'https://googleapis.com/compute/.../instances/%s' %
+            instance['name'])
+        instance['disks'][1]['deviceName'] = instance['name']
+        instance['disks'][1]['source'] = (
+            'https://www.googleapis.com/compute/.../disks/%s' %
+            instance['name'])
+        res.append(instance)
+      cls._instance_resources_cache[key] = res
+    # Callers may modify the returned resources, so they are copied.
+    return copy.deepcopy(res)
 
   def testCheckInstancePreconditionsWithNoMatchingInstances(self):
     self.assertRaises(command_base.CommandError,
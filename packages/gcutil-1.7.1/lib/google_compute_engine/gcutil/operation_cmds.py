@@ -64,7 +64,10 @@ class OperationCommand(command_base.GoogleComputeCommand):
     """
     self._zones_api = api.zones()
 
-    if self._IsUsingAtLeastApiVersion('v1beta14'):
+    # The API version cannot change once the API is set, so it is only
+    # checked once instead of once per operation.
+    self._is_v1beta14 = self._IsUsingAtLeastApiVersion('v1beta14')
+    if self._is_v1beta14:
       self._zone_operations_api = api.zoneOperations()
       self._global_operations_api = api.globalOperations()
     else:
@@ -87,7 +90,7 @@ class OperationCommand(command_base.GoogleComputeCommand):
         'project': self._project,
         'operation': self.DenormalizeResourceName(operation_name)
     }
-    if self._IsUsingAtLeastApiVersion('v1beta14'):
+    if self._is_v1beta14:
       if self._flags.zone != command_base.GLOBAL_ZONE_NAME:
         kwargs['zone'] = self._flags.zone
     for key, value in other_args.items():
@@ -117,7 +120,7 @@ class GetOperation(OperationCommand):
     kwargs = self._PrepareRequestArgs(operation_name)
     method = self._global_operations_api.get
 
-    if self._IsUsingAtLeastApiVersion('v1beta14') and 'zone' in kwargs:
+    if self._is_v1beta14 and 'zone' in kwargs:
       method = self._zone_operations_api.get
 
     request = method(**kwargs)
@@ -143,11 +146,11 @@ class DeleteOperation(OperationCommand):
     for operation_name in operation_names:
       kwargs = self._PrepareRequestArgs(operation_name)
       method = self._global_operations_api.delete
-      if self._IsUsingAtLeastApiVersion('v1beta14') and 'zone' in kwargs:
+      if self._is_v1beta14 and 'zone' in kwargs:
         method = self._zone_operations_api.delete
       requests.append(method(**kwargs))
 
-    _, exceptions = self.ExecuteRequests(requests)
+    _, exceptions = self.ExecuteRequestsInBatches(requests)
     return '', exceptions
 
 
@@ -170,7 +173,7 @@ class ListOperations(OperationCommand, command_base.GoogleComputeListCommand):
 
   def ListZoneFunc(self):
     """Returns the function for listing operations in a zone."""
-    if self._IsUsingAtLeastApiVersion('v1beta14'):
+    if self._is_v1beta14:
       return self._zone_operations_api.list
     return self._global_operations_api.list
 
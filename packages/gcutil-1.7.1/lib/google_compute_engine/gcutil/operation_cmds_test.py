@@ -35,6 +35,14 @@ FLAGS = flags.FLAGS
 
 class OperationCmdsTest(unittest.TestCase):
 
+  def setUp(self):
+    self._old_batch_http_request = command_base.apiclient_http.BatchHttpRequest
+    command_base.apiclient_http.BatchHttpRequest = (
+        mock_api.MockBatchHttpRequest)
+
+  def tearDown(self):
+    command_base.apiclient_http.BatchHttpRequest = self._old_batch_http_request
+
   def _DoTestGetOperationGeneratesCorrectRequest(self, service_version):
     flag_values = copy.deepcopy(FLAGS)
 
@@ -191,6 +199,52 @@ class OperationCmdsTest(unittest.TestCase):
     self.assertEqual(exceptions, [])
     self.assertEqual(results, '')
 
+  def testDeleteMultipleOperationsWithFailures(self):
+    flag_values = copy.deepcopy(FLAGS)
+    command = operation_cmds.DeleteOperation('deleteoperation', flag_values)
+
+    flag_values.project = 'test_project'
+    flag_values.synchronous_mode = True
+
+    command.SetFlags(flag_values)
+    command.SetApi(mock_api.MockApi())
+    command._credential = mock_api.MockCredential()
+    deleted = []
+
+    class DeleteRequest(object):
+
+      def __init__(self, operation):
+        self._operation = operation
+
+      def execute(self, http=None):
+        if self._operation == 'bad-operation':
+          raise command_base.CommandError('Failed to delete.')
+        deleted.append(self._operation)
+        return {'name': self._operation}
+
+    def MockDelete(operation=None, **unused_kwargs):
+      return DeleteRequest(operation)
+
+    def MockWaitForOperation(unused_flag_values, unused_timer, result,
+                             http=None, collection_name=None):
+      if result['name'] == 'slow-operation':
+        raise command_base.CommandError('Failed to wait.')
+      return result
+
+    command._global_operations_api.delete = MockDelete
+    if command._zone_operations_api:
+      command._zone_operations_api.delete = MockDelete
+    command.WaitForOperation = MockWaitForOperation
+
+    results, exceptions = command.Handle(
+        'good-operation-1', 'bad-operation', 'slow-operation',
+        'good-operation-2')
+    self.assertEqual(results, '')
+    self.assertEqual(sorted(str(e) for e in exceptions),
+                     ['Failed to delete.', 'Failed to wait.'])
+    self.assertEqual(deleted, ['good-operation-1', 'slow-operation',
+                               'good-operation-2'])
+
 
 if __name__ == '__main__':
   unittest.main()
@@ -14,12 +14,14 @@
 
 """A set of utility functions."""
 
-import cStringIO
-import numbers
+import itertools
 import socket
 import sys
 
 
+# The longest filter expression NamesExist will put in a single list
+# request, which keeps the request URL well under common length limits.
+MAX_NAME_FILTER_LENGTH = 1024
 
 
 def SimpleName(entity):
@@ -27,20 +29,37 @@ def SimpleName(entity):
     return ''
 
   elif isinstance(entity, basestring):
+    name = entity.rpartition('/')[2]
     if 'projects/google/' in entity:
-      return 'google/' + entity.split('/')[-1]
+      return 'google/' + name
     else:
-      return entity.split('/')[-1]
+      return name
 
-  elif isinstance(entity, numbers.Number):
+  elif isinstance(entity, (int, long, float)):
     return str(entity)
 
   raise ValueError('Expected number or string: ' + str(entity))
 
 
-def FlattenList(list):
+def InternFields(fields):
+  """Interns the strings of a sequence of (display name, field) pairs.
+
+  Field specifications are used as dictionary keys for every row that
+  gets rendered, so interning them once at import time lets lookups
+  short-circuit on identity.
+
+  Args:
+    fields: A sequence of (display name, field name) tuples.
+
+  Returns:
+    A tuple of the same pairs with every string interned.
+  """
+  return tuple((intern(name), intern(field)) for name, field in fields)
+
+
+def FlattenList(lists):
   """Flattens a list of lists."""
-  return [item for sublist in list for item in sublist]
+  return list(itertools.chain.from_iterable(lists))
 
 
 def RegexesToFilterExpression(regexes, op='eq'):
@@ -58,8 +77,7 @@ def RegexesToFilterExpression(regexes, op='eq'):
   """
   if not regexes:
     return None
-  regexes = FlattenList(regex.split() for regex in regexes)
-  return 'name %s %s' % (op, '|'.join(regexes))
+  return 'name %s %s' % (op, '|'.join(' '.join(regexes).split()))
 
 
 def SimplePrint(text, *args, **kwargs):
@@ -78,11 +96,7 @@ def ListStrings(strings, prefix='  '):
   Returns:
     A string containing the names.
   """
-  strings = sorted(strings)
-  buf = cStringIO.StringIO()
-  for string in strings:
-    buf.write(prefix + str(string) + '\n')
-  return buf.getvalue().rstrip()
+  return '\n'.join(prefix + str(string) for string in sorted(strings)).rstrip()
 
 
 def Proceed(message=None):
@@ -99,6 +113,32 @@ def Proceed(message=None):
   return raw_input(message).strip().lower() == 'y'
 
 
+# Results of the protocol and service name lookups, which are served
+# from /etc/protocols and /etc/services and never change while running.
+# Each cache is cleared once it holds _MAX_CACHED_LOOKUPS entries so that
+# a long list of distinct, mostly invalid, names cannot grow it unbounded.
+_MAX_CACHED_LOOKUPS = 256
+_PROTOCOL_NUMBERS = {}
+_PORT_NUMBERS = {}
+
+
+def _CachedLookup(cache, lookup_func, name):
+  """Calls lookup_func(name), caching both results and socket errors."""
+  try:
+    result = cache[name]
+  except KeyError:
+    try:
+      result = lookup_func(name)
+    except socket.error, e:
+      result = e
+    if len(cache) >= _MAX_CACHED_LOOKUPS:
+      cache.clear()
+    cache[name] = result
+  if isinstance(result, socket.error):
+    raise result
+  return result
+
+
 def ParseProtocol(protocol_string):
   """Attempt to parse a protocol number from a string.
 
@@ -112,7 +152,8 @@ def ParseProtocol(protocol_string):
     ValueError: If the protocol_string is not a valid protocol string.
   """
   try:
-    protocol = socket.getprotobyname(protocol_string)
+    protocol = _CachedLookup(
+        _PROTOCOL_NUMBERS, socket.getprotobyname, protocol_string)
   except (socket.error, TypeError):
     try:
       protocol = int(protocol_string)
@@ -142,12 +183,12 @@ def ReplacePortNames(port_range_string):
     raise ValueError('Invalid port range: %s' % port_range_string)
 
   try:
-    low_port = socket.getservbyname(ports[0])
+    low_port = _CachedLookup(_PORT_NUMBERS, socket.getservbyname, ports[0])
   except socket.error:
     low_port = int(ports[0])
 
   try:
-    high_port = socket.getservbyname(ports[-1])
+    high_port = _CachedLookup(_PORT_NUMBERS, socket.getservbyname, ports[-1])
   except socket.error:
     high_port = int(ports[-1])
 
@@ -162,8 +203,9 @@ def Singularize(string):
   return string[:len(string) - 1] if string.endswith('s') else string
 
 
-def All(func, project, max_results=None, filter=None, zone=None):
-  """Calls the given list function while taking care of paging logic.
+def _IterPages(func, project, max_results=None, filter=None, zone=None,
+               http=None):
+  """Yields the responses of the given list function one page at a time.
 
   Args:
     func: A Google Compute Engine list function.
@@ -171,9 +213,10 @@ def All(func, project, max_results=None, filter=None, zone=None):
     max_results: The maximum number of items to return.
     filter: The filter expression to plumb through.
     zone: The zone for list functions that require a zone.
+    http: An optional httplib2.Http object to use for the requests.
 
-  Returns:
-    A list of the resources.
+  Yields:
+    The list responses, as dicts.
   """
   params = {
       'project': project,
@@ -183,26 +226,129 @@ def All(func, project, max_results=None, filter=None, zone=None):
   if zone:
     params['zone'] = zone
 
-  items = []
+  num_items = 0
   while True:
-    res = func(**params).execute()
-    kind = res.get('kind')
-    items.extend(res.get('items', []))
+    res = func(**params).execute(http=http)
+    yield res
+    num_items += len(res.get('items', []))
 
+    # Page tokens are only handed out one page at a time, so the pages
+    # cannot be fetched concurrently; the best we can do is to stop as
+    # soon as enough items have been seen.
     next_page_token = res.get('nextPageToken')
-    if not next_page_token:
+    if not next_page_token or (
+        max_results is not None and num_items >= max_results):
       break
 
     params['pageToken'] = next_page_token
 
+
+def IterAll(func, project, max_results=None, filter=None, zone=None,
+            http=None):
+  """Like All, except yields the resources as their pages arrive.
+
+  The next page is only requested once the resources of the previous
+  one have been consumed, so callers that only need to look at each
+  resource once never hold the whole listing in memory.
+
+  Args:
+    func: A Google Compute Engine list function.
+    project: The project to query.
+    max_results: The maximum number of items to return.
+    filter: The filter expression to plumb through.
+    zone: The zone for list functions that require a zone.
+    http: An optional httplib2.Http object to use for the requests.
+
+  Returns:
+    An iterator over the resources.
+  """
+  pages = _IterPages(func, project, max_results=max_results, filter=filter,
+                     zone=zone, http=http)
+  return itertools.islice(
+      itertools.chain.from_iterable(res.get('items', []) for res in pages),
+      max_results)
+
+
+def All(func, project, max_results=None, filter=None, zone=None, http=None):
+  """Calls the given list function while taking care of paging logic.
+
+  Args:
+    func: A Google Compute Engine list function.
+    project: The project to query.
+    max_results: The maximum number of items to return.
+    filter: The filter expression to plumb through.
+    zone: The zone for list functions that require a zone.
+    http: An optional httplib2.Http object to use for the requests.
+
+  Returns:
+    A list of the resources.
+  """
+  kind = None
+  items = []
+  for res in _IterPages(func, project, max_results=max_results,
+                        filter=filter, zone=zone, http=http):
+    kind = res.get('kind')
+    items.extend(res.get('items', []))
+
   if max_results is not None:
     items = items[:max_results]
   return {'kind': kind,
           'items': items}
 
 
-def AllNames(func, project, max_results=None, filter=None, zone=None):
+def AllNames(func, project, max_results=None, filter=None, zone=None,
+             http=None):
   """Like All, except returns a list of the names of the resources."""
-  list_res = All(
-      func, project, max_results=max_results, filter=filter, zone=zone)
-  return [resource.get('name') for resource in list_res.get('items', [])]
+  return [resource.get('name') for resource in IterAll(
+      func, project, max_results=max_results, filter=filter, zone=zone,
+      http=http)]
+
+
+def NameFilterExpressions(names):
+  """Yields filter expressions that together match the given names.
+
+  The names are split across several expressions if needed to keep
+  each one at most MAX_NAME_FILTER_LENGTH characters long.
+
+  Args:
+    names: The resource names to match.
+
+  Yields:
+    The filter expressions.
+  """
+  chunk = []
+  chunk_length = 0
+  for name in sorted(set(names)):
+    if chunk and chunk_length + len(name) + 1 > MAX_NAME_FILTER_LENGTH:
+      yield RegexesToFilterExpression(chunk)
+      chunk = []
+      chunk_length = 0
+    chunk.append(name)
+    chunk_length += len(name) + 1
+  if chunk:
+    yield RegexesToFilterExpression(chunk)
+
+
+def NamesExist(func, project, names, zone=None, http=None):
+  """Returns the subset of the given names that name existing resources.
+
+  Unlike AllNames, only the resources with the given names are listed,
+  so the cost does not depend on the total number of resources in the
+  collection. The names are split across several list requests if
+  needed to keep each filter expression short.
+
+  Args:
+    func: A Google Compute Engine list function.
+    project: The project to query.
+    names: The resource names to look for.
+    zone: The zone for list functions that require a zone.
+    http: An optional httplib2.Http object to use for the requests.
+
+  Returns:
+    A set of the names that exist.
+  """
+  found = set()
+  for filter_expression in NameFilterExpressions(names):
+    found.update(AllNames(func, project, zone=zone, http=http,
+                          filter=filter_expression))
+  return found & set(names)
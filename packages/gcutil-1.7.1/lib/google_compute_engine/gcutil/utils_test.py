@@ -5,12 +5,45 @@
 import path_initializer
 path_initializer.InitializeSysPath()
 
+import socket
 import unittest
 
 from gcutil import mock_api
 from gcutil import utils
 
 
+class SimpleNameTests(unittest.TestCase):
+  """Tests for utils.SimpleName."""
+  test_cases = (
+      (None, ''),
+      (42, '42'),
+      ('my-disk', 'my-disk'),
+      ('projects/my-project/disks/my-disk', 'my-disk'),
+      ('https://www.googleapis.com/compute/v1beta14/projects/my-project/'
+       'zones/my-zone/disks/my-disk', 'my-disk'),
+      ('https://www.googleapis.com/compute/v1beta14/projects/google/'
+       'global/images/gcel', 'google/gcel'),
+      ('projects/google/global/images/gcel', 'google/gcel'),
+      )
+
+  def testSimpleName(self):
+    for arg, expected in self.test_cases:
+      self.assertEqual(utils.SimpleName(arg), expected)
+    self.assertRaises(ValueError, utils.SimpleName, object())
+
+
+class InternFieldsTests(unittest.TestCase):
+  """Tests for utils.InternFields."""
+
+  def testInternFields(self):
+    field = ''.join(['ephemeralDisks', '.diskGb'])
+    fields = (('name', 'name'), ('ephemeral-disk-size-gb', field))
+    result = utils.InternFields(fields)
+    self.assertEqual(result, fields)
+    self.assertTrue(isinstance(result, tuple))
+    self.assertTrue(result[1][1] is intern('ephemeralDisks.diskGb'))
+
+
 class FlattenListTests(unittest.TestCase):
   """Tests for utils.FlattenList."""
   test_cases = (
@@ -45,6 +78,21 @@ class GlobsToFilterTests(unittest.TestCase):
       self.assertEqual(utils.RegexesToFilterExpression(arg), expected)
 
 
+class ListStringsTests(unittest.TestCase):
+  """Tests for utils.ListStrings."""
+  test_cases = (
+      ([], ''),
+      (['a'], '  a'),
+      (['c', 'a', 'b'], '  a\n  b\n  c'),
+      ([2, 1], '  1\n  2'),
+      )
+
+  def testListStrings(self):
+    for arg, expected in self.test_cases:
+      self.assertEqual(utils.ListStrings(arg), expected)
+    self.assertEqual(utils.ListStrings(['b', 'a'], prefix='- '), '- a\n- b')
+
+
 class ProtocolPortsTests(unittest.TestCase):
 
   def testParseProtocolFailures(self):
@@ -83,6 +131,42 @@ class ProtocolPortsTests(unittest.TestCase):
     for arg, expected in test_cases:
       self.assertEqual(utils.ReplacePortNames(arg), expected)
 
+  def testServiceLookupsAreCached(self):
+    lookups = []
+
+    def MockGetServByName(name):
+      lookups.append(name)
+      if name == 'ssh':
+        return 22
+      raise socket.error('service/proto not found')
+
+    old_getservbyname = socket.getservbyname
+    old_port_numbers = utils._PORT_NUMBERS
+    socket.getservbyname = MockGetServByName
+    utils._PORT_NUMBERS = {}
+    try:
+      for _ in xrange(3):
+        self.assertEqual(utils.ReplacePortNames('ssh-80'), '22-80')
+        self.assertRaises(ValueError, utils.ReplacePortNames, 'foo')
+    finally:
+      socket.getservbyname = old_getservbyname
+      utils._PORT_NUMBERS = old_port_numbers
+    self.assertEqual(sorted(lookups), ['80', 'foo', 'ssh'])
+
+  def testServiceLookupCacheIsBounded(self):
+    old_getservbyname = socket.getservbyname
+    old_port_numbers = utils._PORT_NUMBERS
+    socket.getservbyname = lambda name: 1
+    utils._PORT_NUMBERS = {}
+    try:
+      for i in xrange(utils._MAX_CACHED_LOOKUPS * 2 + 1):
+        utils.ReplacePortNames('service%d' % i)
+        self.assertTrue(
+            len(utils._PORT_NUMBERS) <= utils._MAX_CACHED_LOOKUPS)
+    finally:
+      socket.getservbyname = old_getservbyname
+      utils._PORT_NUMBERS = old_port_numbers
+
 
 class SingularizeTests(unittest.TestCase):
   """Tests for utils.Singularize."""
@@ -188,6 +272,97 @@ class AllTests(unittest.TestCase):
     self.assertEqual(utils.All(mockFunc, 'my-project', max_results=5),
                      {'kind': 'numbers', 'items': [1, 2, 3, 4, 5]})
 
+  def testWithPagingStopsAtMaxResults(self):
+    responses = [
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [1, 2, 3], 'nextPageToken': 'abc'}),
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [4, 5, 6], 'nextPageToken': 'def'}),
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [7, 8, 9]})]
+
+    def mockFunc(project=None, maxResults=None, filter=None, pageToken=None):
+      self._page += 1
+      return responses[self._page - 1]
+
+    self.assertEqual(utils.All(mockFunc, 'my-project', max_results=3),
+                     {'kind': 'numbers', 'items': [1, 2, 3]})
+    self.assertEqual(self._page, 1)
+
+  def testIterAllIsLazy(self):
+    responses = [
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [1, 2, 3], 'nextPageToken': 'abc'}),
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [4, 5, 6]})]
+
+    def mockFunc(project=None, maxResults=None, filter=None, pageToken=None):
+      self._page += 1
+      return responses[self._page - 1]
+
+    items = utils.IterAll(mockFunc, 'my-project')
+    self.assertEqual(self._page, 0)
+    self.assertEqual([items.next() for _ in xrange(3)], [1, 2, 3])
+    self.assertEqual(self._page, 1)
+    self.assertEqual(list(items), [4, 5, 6])
+    self.assertEqual(self._page, 2)
+
+  def testIterAllWithPagingAndSlicing(self):
+    responses = [
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [1, 2, 3], 'nextPageToken': 'abc'}),
+        mock_api.MockRequest(
+            {'kind': 'numbers', 'items': [4, 5, 6]})]
+
+    def mockFunc(project=None, maxResults=None, filter=None, pageToken=None):
+      self._page += 1
+      return responses[self._page - 1]
+
+    self.assertEqual(list(utils.IterAll(mockFunc, 'my-project', max_results=5)),
+                     [1, 2, 3, 4, 5])
+
+
+class NamesExistTests(unittest.TestCase):
+  """Tests for utils.NamesExist."""
+
+  def setUp(self):
+    self._filters = []
+    self._old_max_name_filter_length = utils.MAX_NAME_FILTER_LENGTH
+
+  def tearDown(self):
+    utils.MAX_NAME_FILTER_LENGTH = self._old_max_name_filter_length
+
+  def mockFunc(self, project=None, maxResults=None, filter=None,
+               pageToken=None, zone=None):
+    self._filters.append(filter)
+    existing = ['disk-1', 'disk-3', 'disk-4']
+    names = filter[len('name eq '):].split('|')
+    return mock_api.MockRequest(
+        {'kind': 'disks', 'items': [{'name': name} for name in existing
+                                    if name in names]})
+
+  def testWithNoNames(self):
+    self.assertEqual(utils.NamesExist(self.mockFunc, 'my-project', []),
+                     set())
+    self.assertEqual(self._filters, [])
+
+  def testWithSingleRequest(self):
+    self.assertEqual(
+        utils.NamesExist(self.mockFunc, 'my-project',
+                         ['disk-2', 'disk-1', 'disk-4']),
+        set(['disk-1', 'disk-4']))
+    self.assertEqual(self._filters, ['name eq disk-1|disk-2|disk-4'])
+
+  def testWithManyRequests(self):
+    utils.MAX_NAME_FILTER_LENGTH = 14
+    self.assertEqual(
+        utils.NamesExist(self.mockFunc, 'my-project',
+                         ['disk-1', 'disk-2', 'disk-3', 'disk-4', 'disk-5']),
+        set(['disk-1', 'disk-3', 'disk-4']))
+    self.assertEqual(self._filters, ['name eq disk-1|disk-2',
+                                     'name eq disk-3|disk-4',
+                                     'name eq disk-5'])
+
 
 if __name__ == '__main__':
   unittest.main()
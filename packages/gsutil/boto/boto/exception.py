@@ -474,3 +474,17 @@ class TooManyRecordsException(Exception):
     def __init__(self, message):
         Exception.__init__(self, message)
         self.message = message
+
+
+class RDSBulkRuleError(Exception):
+    """
+    Exception raised when some of the rules of a bulk RDS security group
+    authorization or revocation fail.  results has one entry per rule,
+    in the order the rules were given: the DBSecurityGroup returned for
+    a rule that succeeded, or the exception raised by one that failed.
+    """
+
+    def __init__(self, message, results):
+        Exception.__init__(self, message)
+        self.message = message
+        self.results = results
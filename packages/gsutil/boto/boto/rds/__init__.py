@@ -20,8 +20,20 @@
 # IN THE SOFTWARE.
 #
 
-import urllib
+import copy
+import hashlib
+import Queue
+import sys
+import threading
+import time
+import xml.sax
+
+import boto
+import boto.handler
+from boto import config
 from boto.connection import AWSQueryConnection
+from boto.exception import RDSBulkRuleError
+from boto.resultset import ResultSet
 from boto.rds.dbinstance import DBInstance
 from boto.rds.dbsecuritygroup import DBSecurityGroup
 from boto.rds.parametergroup import ParameterGroup
@@ -30,6 +42,64 @@ from boto.rds.event import Event
 from boto.rds.regioninfo import RDSRegionInfo
 
 
+_region_endpoints = (('us-east-1', 'rds.amazonaws.com'),
+                     ('eu-west-1', 'rds.eu-west-1.amazonaws.com'),
+                     ('us-west-1', 'rds.us-west-1.amazonaws.com'),
+                     ('us-west-2', 'rds.us-west-2.amazonaws.com'),
+                     ('sa-east-1', 'rds.sa-east-1.amazonaws.com'),
+                     ('ap-northeast-1', 'rds.ap-northeast-1.amazonaws.com'),
+                     ('ap-southeast-1', 'rds.ap-southeast-1.amazonaws.com'),
+                     ('ap-southeast-2', 'rds.ap-southeast-2.amazonaws.com'))
+
+_regions = None
+_regions_by_name = None
+
+# Connections returned by connect_to_region, keyed on the region name
+# and the connection parameters, so that repeated calls with the same
+# arguments share one connection and its pool of HTTP connections.
+# The oldest connection is evicted once the cache is full.
+_connection_cache = {}
+_connection_cache_keys = []
+_connection_cache_lock = threading.Lock()
+_connection_cache_size = 16
+# Only a digest of these parameters is kept in the cache keys.
+_secret_params = frozenset(['aws_secret_access_key', 'security_token',
+                            'proxy_pass'])
+
+# The query API spells booleans in lower case.
+_bool_str = {True: 'true', False: 'false'}
+
+
+def _get_regions():
+    """
+    Build the tuple of RDS regions on first use and reuse it afterwards.
+    The regions are static, so there is no need to allocate them again
+    on every lookup.  This cannot happen at import time because
+    RDSRegionInfo needs RDSConnection, which is defined further down.
+
+    The names and endpoints are interned, since they are compared
+    against and used as dictionary keys on every region lookup.
+    """
+    global _regions
+    if _regions is None:
+        _regions = tuple(RDSRegionInfo(name=intern(name),
+                                       endpoint=intern(endpoint))
+                         for name, endpoint in _region_endpoints)
+    return _regions
+
+
+def _get_regions_by_name():
+    """
+    Map each RDS region name to its region, so that looking up a region
+    by name does not need to scan the whole table.
+    """
+    global _regions_by_name
+    if _regions_by_name is None:
+        _regions_by_name = dict((region.name, region)
+                                for region in _get_regions())
+    return _regions_by_name
+
+
 def regions():
     """
     Get all available regions for the RDS service.
@@ -37,23 +107,7 @@ def regions():
     :rtype: list
     :return: A list of :class:`boto.rds.regioninfo.RDSRegionInfo`
     """
-    return [RDSRegionInfo(name='us-east-1',
-                          endpoint='rds.amazonaws.com'),
-            RDSRegionInfo(name='eu-west-1',
-                          endpoint='rds.eu-west-1.amazonaws.com'),
-            RDSRegionInfo(name='us-west-1',
-                          endpoint='rds.us-west-1.amazonaws.com'),
-            RDSRegionInfo(name='us-west-2',
-                          endpoint='rds.us-west-2.amazonaws.com'),
-            RDSRegionInfo(name='sa-east-1',
-                          endpoint='rds.sa-east-1.amazonaws.com'),
-            RDSRegionInfo(name='ap-northeast-1',
-                          endpoint='rds.ap-northeast-1.amazonaws.com'),
-            RDSRegionInfo(name='ap-southeast-1',
-                          endpoint='rds.ap-southeast-1.amazonaws.com'),
-            RDSRegionInfo(name='ap-southeast-2',
-                          endpoint='rds.ap-southeast-2.amazonaws.com'),
-            ]
+    return list(_get_regions())
 
 
 def connect_to_region(region_name, **kw_params):
@@ -66,14 +120,86 @@ def connect_to_region(region_name, **kw_params):
     :type: str
     :param region_name: The name of the region to connect to.
 
+    Connections are cached, so calling this again with the same
+    arguments returns the same connection.  Use clear_region_cache to
+    get a new one.
+
     :rtype: :class:`boto.rds.RDSConnection` or ``None``
     :return: A connection to the given region, or None if an invalid region
              name is given
     """
-    for region in regions():
-        if region.name == region_name:
-            return region.connect(**kw_params)
-    return None
+    region = _get_regions_by_name().get(region_name)
+    if region is None:
+        return None
+    key = _connection_cache_key(region_name, kw_params)
+    try:
+        hash(key)
+    except TypeError:
+        # Parameters such as a connection factory list cannot be used
+        # as a key, so the connection is not cached.
+        return region.connect(**kw_params)
+    with _connection_cache_lock:
+        connection = _connection_cache.get(key)
+        if connection is None:
+            connection = region.connect(**kw_params)
+            _connection_cache[key] = connection
+            _connection_cache_keys.append(key)
+            if len(_connection_cache_keys) > _connection_cache_size:
+                del _connection_cache[_connection_cache_keys.pop(0)]
+    return connection
+
+
+def _connection_cache_key(region_name, kw_params):
+    key = [region_name]
+    for name, value in sorted(kw_params.iteritems()):
+        if name in _secret_params and value is not None:
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            value = hashlib.sha256(value).hexdigest()
+        key.append((name, value))
+    return tuple(key)
+
+
+def clear_region_cache():
+    """
+    Forget the connections cached by connect_to_region.
+    """
+    with _connection_cache_lock:
+        _connection_cache.clear()
+        del _connection_cache_keys[:]
+
+
+def _max_records(max_records):
+    """
+    Return the MaxRecords value to send with a Describe call.  Defaults
+    to the server maximum of 100, so that listing up to 100 records
+    always takes a single round trip, and rejects values the server
+    would refuse before making the request.
+    """
+    if max_records is None:
+        return 100
+    if not 20 <= max_records <= 100:
+        raise ValueError('max_records must be between 20 and 100, got %r' %
+                         (max_records,))
+    return max_records
+
+
+def _optional_params(*pairs):
+    """
+    Build a params dict from (name, value) pairs, leaving out the
+    parameters whose value is empty.
+    """
+    return dict((name, value) for name, value in pairs if value)
+
+
+def _security_group_names(security_groups):
+    """
+    Convert a list of DBSecurityGroup objects and/or group names into
+    a list of group names.  Any object with a ``name`` attribute is
+    treated as a group.
+    """
+    return [getattr(group, 'name', group) for group in security_groups]
+
 
 #boto.set_stream_logger('rds')
 
@@ -83,12 +209,42 @@ class RDSConnection(AWSQueryConnection):
     DefaultRegionName = 'us-east-1'
     DefaultRegionEndpoint = 'rds.amazonaws.com'
     APIVersion = '2012-09-17'
+    # The number of bytes of a response that are parsed at a time when
+    # results are streamed rather than returned as a list.
+    ResponseChunkSize = 8192
+    # The maximum number of responses kept by the Describe cache.
+    DescribeCacheSize = 256
+    # The maximum number of requests in flight at once on a connection,
+    # and the number of worker threads used by call_parallel.
+    MaxParallelCalls = 10
+    # Error codes of 400 responses that are retried with backoff.
+    ThrottlingErrors = ('Throttling', 'RequestLimitExceeded')
 
     def __init__(self, aws_access_key_id=None, aws_secret_access_key=None,
                  is_secure=True, port=None, proxy=None, proxy_port=None,
                  proxy_user=None, proxy_pass=None, debug=0,
                  https_connection_factory=None, region=None, path='/',
-                 security_token=None, validate_certs=True):
+                 security_token=None, validate_certs=True,
+                 describe_cache_ttl=0):
+        """
+        :type describe_cache_ttl: int
+        :param describe_cache_ttl: The number of seconds for which the
+            results of the get_all_* methods are cached, so that
+            repeating a call with the same arguments does not make
+            another request.  Any request other than a Describe call
+            empties the cache.  The default of 0 disables caching.
+        """
+        self.describe_cache_ttl = describe_cache_ttl
+        self._describe_cache = {}
+        self._describe_cache_lock = threading.Lock()
+        self._parallel_calls = threading.BoundedSemaphore(
+            self.MaxParallelCalls)
+        self._parallel_calls_lock = threading.Lock()
+        # The number of requests that had to wait for another to finish
+        # because MaxParallelCalls requests were already in flight.
+        self.parallel_call_waits = 0
+        # The number of requests retried because they were throttled.
+        self.throttled_requests = 0
         if not region:
             region = RDSRegionInfo(self, self.DefaultRegionName,
                                    self.DefaultRegionEndpoint)
@@ -105,10 +261,279 @@ class RDSConnection(AWSQueryConnection):
     def _required_auth_capability(self):
         return ['rds']
 
+    def make_request(self, action, params=None, path='/', verb='GET',
+                     override_num_retries=None):
+        if not action.startswith('Describe'):
+            # The request may change what a Describe call returns.
+            self.clear_describe_cache()
+        http_request = self.build_base_http_request(verb, path, None,
+                                                    params, {}, '',
+                                                    self.server_name())
+        http_request.params['Action'] = action
+        http_request.params['Version'] = self.APIVersion
+        if override_num_retries is None:
+            num_retries = config.getint('Boto', 'num_retries',
+                                        self.num_retries)
+        else:
+            num_retries = override_num_retries
+
+        def retry_handler(response, i, next_sleep):
+            return self._retry_handler(response, i, next_sleep, num_retries)
+
+        # Only the HTTP request itself holds a slot, so methods that make
+        # their own parallel calls can be called in parallel.
+        if not self._parallel_calls.acquire(False):
+            with self._parallel_calls_lock:
+                self.parallel_call_waits += 1
+            self._parallel_calls.acquire()
+        try:
+            return self._mexe(http_request,
+                              override_num_retries=num_retries,
+                              retry_handler=retry_handler)
+        finally:
+            self._parallel_calls.release()
+
+    def _retry_handler(self, response, i, next_sleep, num_retries):
+        """
+        Retry throttled requests with the same exponential backoff _mexe
+        uses for 5xx responses.  Any other response, and the last
+        throttled one, is returned to the caller as usual.
+        """
+        if response.status != 400 or i >= num_retries:
+            return None
+        body = response.read()
+        error = self.ResponseError(response.status, response.reason, body)
+        if error.error_code not in self.ThrottlingErrors:
+            return None
+        with self._parallel_calls_lock:
+            self.throttled_requests += 1
+        msg = '%s, retry attempt %s' % (error.error_code, i)
+        return msg, i + 1, next_sleep
+
+    def clear_describe_cache(self):
+        """
+        Forget the cached results of the get_all_* methods.
+        """
+        with self._describe_cache_lock:
+            self._describe_cache.clear()
+
+    def _cached_describe(self, get, action, params, cls):
+        """
+        Call get (get_list or get_object) unless its result for the same
+        action and params is still in the Describe cache.  A deep copy
+        of the cached result is returned, so callers may modify it and
+        the objects in it.  The objects still refer to this connection.
+        """
+        if not self.describe_cache_ttl:
+            return get(action, params, cls)
+        key = (action, frozenset(params.iteritems()))
+        with self._describe_cache_lock:
+            expires, result = self._describe_cache.get(key, (0, None))
+        if expires > time.time():
+            return copy.deepcopy(result, {id(self): self})
+        result = get(action, params, cls)
+        now = time.time()
+        with self._describe_cache_lock:
+            cache = self._describe_cache
+            if len(cache) >= self.DescribeCacheSize:
+                for old_key, (old_expires, _) in cache.items():
+                    if old_expires <= now:
+                        del cache[old_key]
+                if len(cache) >= self.DescribeCacheSize:
+                    del cache[min(cache, key=lambda k: cache[k][0])]
+            cache[key] = (now + self.describe_cache_ttl, result)
+        return copy.deepcopy(result, {id(self): self})
+
+    def _iter_list(self, action, params, markers):
+        """
+        Iterate over the objects returned by a paginated Describe call,
+        following the Marker of each page until the last page has been
+        read.  Pages are only requested as the previous one is consumed.
+        """
+        while True:
+            rs = ResultSet(markers)
+            for obj in self._iter_response(action, params, rs):
+                yield obj
+            if not rs.marker:
+                break
+            params['Marker'] = rs.marker
+
+    def _iter_response(self, action, params, rs):
+        """
+        Like get_list, except that the response is parsed incrementally
+        and each object is yielded as soon as its element has been
+        parsed, rather than once the whole body has been read.  The
+        objects are not kept in rs, so only the objects the caller holds
+        on to stay in memory; the other attributes of rs, such as its
+        marker, are set once the generator is exhausted.
+        """
+        response = self.make_request(action, params)
+        if response.status != 200:
+            body = response.read()
+            boto.log.error('%s %s' % (response.status, response.reason))
+            boto.log.error('%s' % body)
+            raise self.ResponseError(response.status, response.reason, body)
+        h = boto.handler.XmlHandler(rs, self)
+        parser = xml.sax.make_parser()
+        parser.setContentHandler(h)
+        chunk_size = self.ResponseChunkSize
+        empty = True
+        while True:
+            chunk = response.read(chunk_size)
+            if chunk:
+                empty = False
+                parser.feed(chunk)
+            # Only the last object can still be in the middle of being
+            # parsed; everything before it is complete.
+            done = len(rs)
+            if done and any(node is rs[-1] for _, node in h.nodes):
+                done -= 1
+            objs = rs[:done]
+            del rs[:done]
+            for obj in objs:
+                yield obj
+            # httplib only returns fewer bytes than requested at the end
+            # of the body.
+            if len(chunk) < chunk_size:
+                break
+        if empty:
+            boto.log.error('Null body')
+            raise self.ResponseError(response.status, response.reason, '')
+        parser.close()
+        objs = rs[:]
+        del rs[:]
+        for obj in objs:
+            yield obj
+
+    def _prefetch(self, items, size):
+        """
+        Consume the items iterator in a background thread, at most size
+        items ahead of the caller, so that the next page of a paginated
+        Describe call is requested and parsed while the caller is still
+        working through the current one.  An exception raised while
+        reading items is re-raised in the caller once the items before
+        it have been yielded.
+        """
+        queue = Queue.Queue(size)
+        stopped = threading.Event()
+
+        def put(entry):
+            while not stopped.isSet():
+                try:
+                    queue.put(entry, timeout=0.1)
+                    return True
+                except Queue.Full:
+                    pass
+            return False
+
+        def produce():
+            try:
+                for item in items:
+                    if not put((True, item)):
+                        return
+            except Exception:
+                put((False, sys.exc_info()))
+            else:
+                put((False, None))
+
+        thread = threading.Thread(target=produce)
+        thread.daemon = True
+        thread.start()
+        try:
+            while True:
+                more, value = queue.get()
+                if not more:
+                    if value is not None:
+                        raise value[0], value[1], value[2]
+                    return
+                yield value
+        finally:
+            # Stop the producer if the caller stops iterating early.
+            stopped.set()
+
+    def call_parallel(self, *calls):
+        """
+        Issue several independent calls concurrently, so the total time
+        is that of the slowest call rather than the sum of all of them.
+        The calls run on at most MaxParallelCalls worker threads, and
+        each request gets its own HTTP connection from the connection
+        pool.  At most MaxParallelCalls requests are in flight at once on
+        this connection, however many calls are running; the others wait
+        for a free slot, which is counted in parallel_call_waits.
+        Throttled requests are retried with exponential backoff.  Calls
+        that change resources, such as creating several snapshots or
+        authorizing several CIDR ranges, can be overlapped as well as
+        describe calls, as long as they do not depend on each other.
+
+        :type calls: tuple
+        :param calls: Each call is a (method_name, args, kwargs) tuple
+                      naming a method of this connection, e.g.
+                      ``('create_dbsnapshot', ('mysnapshot',
+                      'myinstance'), {})``.
+
+        :rtype: list
+        :return: The result of each call, in the order the calls were
+                 given.  If any call raised an exception, the exception
+                 of the first such call is re-raised once all the calls
+                 have finished.
+        """
+        results, errors = self._run_parallel(calls)
+        for error in errors:
+            if error is not None:
+                raise error[0], error[1], error[2]
+        return results
+
+    def _run_parallel(self, calls):
+        """
+        Run calls as call_parallel does and return a (results, errors)
+        tuple of lists with one entry per call, where each error is the
+        sys.exc_info() of the call's exception, or None.
+        """
+        results = [None] * len(calls)
+        errors = [None] * len(calls)
+        pending = Queue.Queue()
+        for index, call in enumerate(calls):
+            pending.put((index,) + tuple(call))
+
+        def call(index, method_name, args, kwargs):
+            try:
+                results[index] = getattr(self, method_name)(*args, **kwargs)
+            except Exception:
+                errors[index] = sys.exc_info()
+
+        def work():
+            while True:
+                try:
+                    call(*pending.get_nowait())
+                except Queue.Empty:
+                    return
+
+        threads = [threading.Thread(target=work)
+                   for _ in xrange(min(len(calls), self.MaxParallelCalls))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+    def get_all_dbinstances_and_parameter_groups(self):
+        """
+        Retrieve the DBInstances and the DBParameterGroups in your account
+        with two concurrent requests.
+
+        :rtype: tuple
+        :return: A (DBInstances, DBParameterGroups) tuple, where each
+                 element is the list that get_all_dbinstances and
+                 get_all_dbparameter_groups would have returned.
+        """
+        return tuple(self.call_parallel(
+            ('get_all_dbinstances', (), {}),
+            ('get_all_dbparameter_groups', (), {})))
+
     # DB Instance methods
 
     def get_all_dbinstances(self, instance_id=None, max_records=None,
-                            marker=None):
+                            marker=None, auto_paginate=False):
         """
         Retrieve all the DBInstances in your account.
 
@@ -123,22 +548,60 @@ class RDSConnection(AWSQueryConnection):
                             If more results are available, a MoreToken will
                             be returned in the response that can be used to
                             retrieve additional records.  Default is 100.
+                            Must be between 20 and 100.
 
         :type marker: str
         :param marker: The marker provided by a previous request.
 
+        :type auto_paginate: bool
+        :param auto_paginate: If True, keep following the marker until
+                              all DBInstances have been retrieved rather
+                              than returning a single page.
+
         :rtype: list
         :return: A list of :class:`boto.rds.dbinstance.DBInstance`
         """
-        params = {}
+        if auto_paginate:
+            return list(self.iter_dbinstances(instance_id, max_records,
+                                              marker))
+        params = {'MaxRecords': _max_records(max_records)}
+        if instance_id:
+            params['DBInstanceIdentifier'] = instance_id
+        if marker:
+            params['Marker'] = marker
+        return self._cached_describe(
+            self.get_list, 'DescribeDBInstances', params,
+            [('DBInstance', DBInstance)])
+
+    def iter_dbinstances(self, instance_id=None, page_size=None,
+                         marker=None):
+        """
+        Iterate over all the DBInstances in your account, requesting the
+        next page of results only once the previous one has been
+        consumed.
+
+        :type instance_id: str
+        :param instance_id: DB Instance identifier.  If supplied, only
+                            information this instance will be returned.
+
+        :type page_size: int
+        :param page_size: The maximum number of records to request per
+                          page.  Default is 100.  Must be between 20
+                          and 100.
+
+        :type marker: str
+        :param marker: The marker provided by a previous request.
+
+        :rtype: generator
+        :return: A generator of :class:`boto.rds.dbinstance.DBInstance`
+        """
+        params = {'MaxRecords': _max_records(page_size)}
         if instance_id:
             params['DBInstanceIdentifier'] = instance_id
-        if max_records:
-            params['MaxRecords'] = max_records
         if marker:
             params['Marker'] = marker
-        return self.get_list('DescribeDBInstances', params,
-                             [('DBInstance', DBInstance)])
+        return self._iter_list('DescribeDBInstances', params,
+                               [('DBInstance', DBInstance)])
 
     def create_dbinstance(self,
                           id,
@@ -388,41 +851,40 @@ class RDSConnection(AWSQueryConnection):
         # port => Port
         # preferred_backup_window => PreferredBackupWindow
         # preferred_maintenance_window => PreferredMaintenanceWindow
-        params = {
-                  'AllocatedStorage': allocated_storage,
-                  'AutoMinorVersionUpgrade': str(auto_minor_version_upgrade).lower() if auto_minor_version_upgrade else None,
-                  'AvailabilityZone': availability_zone,
-                  'BackupRetentionPeriod': backup_retention_period,
-                  'CharacterSetName': character_set_name,
-                  'DBInstanceClass': instance_class,
-                  'DBInstanceIdentifier': id,
-                  'DBName': db_name,
-                  'DBParameterGroupName': param_group,
-                  'DBSubnetGroupName': db_subnet_group_name,
-                  'Engine': engine,
-                  'EngineVersion': engine_version,
-                  'Iops': iops,
-                  'LicenseModel': license_model,
-                  'MainUsername': main_username,
-                  'MainUserPassword': main_password,
-                  'MultiAZ': str(multi_az).lower() if multi_az else None,
-                  'OptionGroupName': option_group_name,
-                  'Port': port,
-                  'PreferredBackupWindow': preferred_backup_window,
-                  'PreferredMaintenanceWindow': preferred_maintenance_window,
-                  }
+        if auto_minor_version_upgrade is not None:
+            auto_minor_version_upgrade = _bool_str[
+                bool(auto_minor_version_upgrade)]
+        if multi_az is not None:
+            multi_az = _bool_str[bool(multi_az)]
+        # Params set to None are left out.  Other false values such as a
+        # backup_retention_period of 0 are meaningful and are kept.
+        params = dict((key, value) for key, value in (
+            ('AllocatedStorage', allocated_storage),
+            ('AutoMinorVersionUpgrade', auto_minor_version_upgrade),
+            ('AvailabilityZone', availability_zone),
+            ('BackupRetentionPeriod', backup_retention_period),
+            ('CharacterSetName', character_set_name),
+            ('DBInstanceClass', instance_class),
+            ('DBInstanceIdentifier', id),
+            ('DBName', db_name),
+            ('DBParameterGroupName', param_group),
+            ('DBSubnetGroupName', db_subnet_group_name),
+            ('Engine', engine),
+            ('EngineVersion', engine_version),
+            ('Iops', iops),
+            ('LicenseModel', license_model),
+            ('MainUserPassword', main_password),
+            ('MainUsername', main_username),
+            ('MultiAZ', multi_az),
+            ('OptionGroupName', option_group_name),
+            ('Port', port),
+            ('PreferredBackupWindow', preferred_backup_window),
+            ('PreferredMaintenanceWindow', preferred_maintenance_window),
+            ) if value is not None)
         if security_groups:
-            l = []
-            for group in security_groups:
-                if isinstance(group, DBSecurityGroup):
-                    l.append(group.name)
-                else:
-                    l.append(group)
-            self.build_list_params(params, l, 'DBSecurityGroups.member')
-
-        # Remove any params set to None
-        for k, v in params.items():
-          if not v: del(params[k])
+            params.update(
+                ('DBSecurityGroups.member.%d' % i, name) for i, name in
+                enumerate(_security_group_names(security_groups), 1))
 
         return self.get_object('CreateDBInstance', params, DBInstance)
 
@@ -480,17 +942,14 @@ class RDSConnection(AWSQueryConnection):
         """
         params = {'DBInstanceIdentifier': id,
                   'SourceDBInstanceIdentifier': source_id}
-        if instance_class:
-            params['DBInstanceClass'] = instance_class
-        if port:
-            params['Port'] = port
-        if availability_zone:
-            params['AvailabilityZone'] = availability_zone
         if auto_minor_version_upgrade is not None:
-            if auto_minor_version_upgrade is True:
-                params['AutoMinorVersionUpgrade'] = 'true'
-            else:
-                params['AutoMinorVersionUpgrade'] = 'false'
+            params['AutoMinorVersionUpgrade'] = _bool_str[
+                bool(auto_minor_version_upgrade)]
+        params.update((key, value) for key, value in (
+            ('AvailabilityZone', availability_zone),
+            ('DBInstanceClass', instance_class),
+            ('Port', port),
+            ) if value)
 
         return self.get_object('CreateDBInstanceReadReplica',
                                params, DBInstance)
@@ -501,7 +960,7 @@ class RDSConnection(AWSQueryConnection):
                           instance_class=None,
                           backup_retention_period=None,
                           preferred_backup_window=None,
-                          multi_az=False,
+                          multi_az=None,
                           apply_immediately=False,
                           iops=None):
         """
@@ -561,7 +1020,9 @@ class RDSConnection(AWSQueryConnection):
 
         :type multi_az: bool
         :param multi_az: If True, specifies the DB Instance will be
-                         deployed in multiple availability zones.
+                         deployed in multiple availability zones.  If
+                         False, the DB Instance will be moved to a single
+                         availability zone.  Default is to leave it as is.
 
         :type iops: int
         :param iops:  The amount of IOPS (input/output operations per second) to Provisioned
@@ -577,35 +1038,25 @@ class RDSConnection(AWSQueryConnection):
         :rtype: :class:`boto.rds.dbinstance.DBInstance`
         :return: The modified db instance.
         """
-        params = {'DBInstanceIdentifier': id}
-        if param_group:
-            params['DBParameterGroupName'] = param_group
+        params = _optional_params(
+            ('AllocatedStorage', allocated_storage),
+            ('DBInstanceClass', instance_class),
+            ('DBParameterGroupName', param_group),
+            ('Iops', iops),
+            ('MainUserPassword', main_password),
+            ('PreferredBackupWindow', preferred_backup_window),
+            ('PreferredMaintenanceWindow', preferred_maintenance_window))
+        params['DBInstanceIdentifier'] = id
         if security_groups:
-            l = []
-            for group in security_groups:
-                if isinstance(group, DBSecurityGroup):
-                    l.append(group.name)
-                else:
-                    l.append(group)
-            self.build_list_params(params, l, 'DBSecurityGroups.member')
-        if preferred_maintenance_window:
-            params['PreferredMaintenanceWindow'] = preferred_maintenance_window
-        if main_password:
-            params['MainUserPassword'] = main_password
-        if allocated_storage:
-            params['AllocatedStorage'] = allocated_storage
-        if instance_class:
-            params['DBInstanceClass'] = instance_class
-        if backup_retention_period is not None:
-            params['BackupRetentionPeriod'] = backup_retention_period
-        if preferred_backup_window:
-            params['PreferredBackupWindow'] = preferred_backup_window
-        if multi_az:
-            params['MultiAZ'] = 'true'
+            params.update(
+                ('DBSecurityGroups.member.%d' % i, name) for i, name in
+                enumerate(_security_group_names(security_groups), 1))
+        if multi_az is not None:
+            params['MultiAZ'] = _bool_str[bool(multi_az)]
         if apply_immediately:
             params['ApplyImmediately'] = 'true'
-        if iops:
-            params['Iops'] = iops
+        if backup_retention_period is not None:
+            params['BackupRetentionPeriod'] = backup_retention_period
 
         return self.get_object('ModifyDBInstance', params, DBInstance)
 
@@ -631,11 +1082,9 @@ class RDSConnection(AWSQueryConnection):
         :rtype: :class:`boto.rds.dbinstance.DBInstance`
         :return: The deleted db instance.
         """
-        params = {'DBInstanceIdentifier': id}
-        if skip_final_snapshot:
-            params['SkipFinalSnapshot'] = 'true'
-        else:
-            params['SkipFinalSnapshot'] = 'false'
+        params = {'DBInstanceIdentifier': id,
+                  'SkipFinalSnapshot': _bool_str[bool(skip_final_snapshot)]}
+        if not skip_final_snapshot:
             params['FinalDBSnapshotIdentifier'] = final_snapshot_id
         return self.get_object('DeleteDBInstance', params, DBInstance)
 
@@ -655,7 +1104,7 @@ class RDSConnection(AWSQueryConnection):
     # DBParameterGroup methods
 
     def get_all_dbparameter_groups(self, groupname=None, max_records=None,
-                                  marker=None):
+                                  marker=None, auto_paginate=False):
         """
         Get all parameter groups associated with your account in a region.
 
@@ -668,25 +1117,64 @@ class RDSConnection(AWSQueryConnection):
                             If more results are available, a MoreToken will
                             be returned in the response that can be used to
                             retrieve additional records.  Default is 100.
+                            Must be between 20 and 100.
 
         :type marker: str
         :param marker: The marker provided by a previous request.
 
+        :type auto_paginate: bool
+        :param auto_paginate: If True, keep following the marker until
+                              all parameter groups have been retrieved
+                              rather than returning a single page.
+
         :rtype: list
         :return: A list of :class:`boto.ec2.parametergroup.ParameterGroup`
         """
-        params = {}
+        if auto_paginate:
+            return list(self.iter_dbparameter_groups(groupname, max_records,
+                                                     marker))
+        params = {'MaxRecords': _max_records(max_records)}
+        if groupname:
+            params['DBParameterGroupName'] = groupname
+        if marker:
+            params['Marker'] = marker
+        return self._cached_describe(
+            self.get_list, 'DescribeDBParameterGroups', params,
+            [('DBParameterGroup', ParameterGroup)])
+
+    def iter_dbparameter_groups(self, groupname=None, page_size=None,
+                                marker=None):
+        """
+        Iterate over all the parameter groups associated with your account
+        in a region, requesting the next page of results only once the
+        previous one has been consumed.
+
+        :type groupname: str
+        :param groupname: The name of the DBParameter group to retrieve.
+                          If not provided, all DBParameter groups will be returned.
+
+        :type page_size: int
+        :param page_size: The maximum number of records to request per
+                          page.  Default is 100.  Must be between 20
+                          and 100.
+
+        :type marker: str
+        :param marker: The marker provided by a previous request.
+
+        :rtype: generator
+        :return: A generator of :class:`boto.ec2.parametergroup.ParameterGroup`
+        """
+        params = {'MaxRecords': _max_records(page_size)}
         if groupname:
             params['DBParameterGroupName'] = groupname
-        if max_records:
-            params['MaxRecords'] = max_records
         if marker:
             params['Marker'] = marker
-        return self.get_list('DescribeDBParameterGroups', params,
-                             [('DBParameterGroup', ParameterGroup)])
+        return self._iter_list('DescribeDBParameterGroups', params,
+                               [('DBParameterGroup', ParameterGroup)])
 
     def get_all_dbparameters(self, groupname, source=None,
-                             max_records=None, marker=None):
+                             max_records=None, marker=None,
+                             auto_paginate=False):
         """
         Get all parameters associated with a ParameterGroup
 
@@ -703,21 +1191,33 @@ class RDSConnection(AWSQueryConnection):
                             If more results are available, a MoreToken will
                             be returned in the response that can be used to
                             retrieve additional records.  Default is 100.
+                            Must be between 20 and 100.
 
         :type marker: str
         :param marker: The marker provided by a previous request.
 
+        :type auto_paginate: bool
+        :param auto_paginate: If True, keep following the marker until
+                              all parameters have been retrieved into
+                              the returned ParameterGroup.
+
         :rtype: :class:`boto.ec2.parametergroup.ParameterGroup`
         :return: The ParameterGroup
         """
-        params = {'DBParameterGroupName': groupname}
-        if source:
-            params['Source'] = source
-        if max_records:
-            params['MaxRecords'] = max_records
-        if marker:
-            params['Marker'] = marker
-        pg = self.get_object('DescribeDBParameters', params, ParameterGroup)
+        params = _optional_params(('Source', source), ('Marker', marker))
+        params['DBParameterGroupName'] = groupname
+        params['MaxRecords'] = _max_records(max_records)
+        pg = self._cached_describe(self.get_object, 'DescribeDBParameters',
+                                   params, ParameterGroup)
+        if auto_paginate:
+            page = pg
+            while getattr(page, 'Marker', None):
+                params['Marker'] = page.Marker
+                page = self._cached_describe(self.get_object,
+                                             'DescribeDBParameters', params,
+                                             ParameterGroup)
+                pg.update(page)
+            pg.Marker = None
         pg.name = groupname
         return pg
 
@@ -756,9 +1256,8 @@ class RDSConnection(AWSQueryConnection):
         :return: The newly created ParameterGroup
         """
         params = {'DBParameterGroupName': name}
-        for i in range(0, len(parameters)):
-            parameter = parameters[i]
-            parameter.merge(params, i+1)
+        for i, parameter in enumerate(parameters, 1):
+            parameter.merge(params, i)
         return self.get_list('ModifyDBParameterGroup', params,
                              ParameterGroup, verb='POST')
 
@@ -775,14 +1274,11 @@ class RDSConnection(AWSQueryConnection):
         :param parameters: The parameters to reset.  If not supplied,
                            all parameters will be reset.
         """
-        params = {'DBParameterGroupName': name}
-        if reset_all_params:
-            params['ResetAllParameters'] = 'true'
-        else:
-            params['ResetAllParameters'] = 'false'
-            for i in range(0, len(parameters)):
-                parameter = parameters[i]
-                parameter.merge(params, i+1)
+        params = {'DBParameterGroupName': name,
+                  'ResetAllParameters': _bool_str[bool(reset_all_params)]}
+        if not reset_all_params:
+            for i, parameter in enumerate(parameters, 1):
+                parameter.merge(params, i)
         return self.get_status('ResetDBParameterGroup', params)
 
     def delete_parameter_group(self, name):
@@ -798,7 +1294,7 @@ class RDSConnection(AWSQueryConnection):
     # DBSecurityGroup methods
 
     def get_all_dbsecurity_groups(self, groupname=None, max_records=None,
-                                  marker=None):
+                                  marker=None, auto_paginate=False):
         """
         Get all security groups associated with your account in a region.
 
@@ -812,22 +1308,60 @@ class RDSConnection(AWSQueryConnection):
                             If more results are available, a MoreToken will
                             be returned in the response that can be used to
                             retrieve additional records.  Default is 100.
+                            Must be between 20 and 100.
 
         :type marker: str
         :param marker: The marker provided by a previous request.
 
+        :type auto_paginate: bool
+        :param auto_paginate: If True, keep following the marker until
+                              all security groups have been retrieved rather
+                              than returning a single page.
+
         :rtype: list
         :return: A list of :class:`boto.rds.dbsecuritygroup.DBSecurityGroup`
         """
-        params = {}
+        if auto_paginate:
+            return list(self.iter_dbsecurity_groups(groupname, max_records,
+                                                    marker))
+        params = _optional_params(('DBSecurityGroupName', groupname),
+                                  ('Marker', marker))
+        params['MaxRecords'] = _max_records(max_records)
+        return self._cached_describe(
+            self.get_list, 'DescribeDBSecurityGroups', params,
+            [('DBSecurityGroup', DBSecurityGroup)])
+
+    def iter_dbsecurity_groups(self, groupname=None, page_size=None,
+                               marker=None):
+        """
+        Iterate over all the security groups associated with your account
+        in a region, requesting the next page of results only once the
+        previous one has been consumed.
+
+        :type groupname: str
+        :param groupname: The name of the security group to retrieve.
+                          If not provided, all security groups will
+                          be returned.
+
+        :type page_size: int
+        :param page_size: The maximum number of records to request per
+                          page.  Default is 100.  Must be between 20
+                          and 100.
+
+        :type marker: str
+        :param marker: The marker provided by a previous request.
+
+        :rtype: generator
+        :return: A generator of
+                 :class:`boto.rds.dbsecuritygroup.DBSecurityGroup`
+        """
+        params = {'MaxRecords': _max_records(page_size)}
         if groupname:
             params['DBSecurityGroupName'] = groupname
-        if max_records:
-            params['MaxRecords'] = max_records
         if marker:
             params['Marker'] = marker
-        return self.get_list('DescribeDBSecurityGroups', params,
-                             [('DBSecurityGroup', DBSecurityGroup)])
+        return self._iter_list('DescribeDBSecurityGroups', params,
+                               [('DBSecurityGroup', DBSecurityGroup)])
 
     def create_dbsecurity_group(self, name, description=None):
         """
@@ -891,13 +1425,11 @@ class RDSConnection(AWSQueryConnection):
         :rtype: bool
         :return: True if successful.
         """
-        params = {'DBSecurityGroupName': group_name}
-        if ec2_security_group_name:
-            params['EC2SecurityGroupName'] = ec2_security_group_name
-        if ec2_security_group_owner_id:
-            params['EC2SecurityGroupOwnerId'] = ec2_security_group_owner_id
-        if cidr_ip:
-            params['CIDRIP'] = urllib.quote(cidr_ip)
+        params = _optional_params(
+            ('CIDRIP', cidr_ip),
+            ('EC2SecurityGroupName', ec2_security_group_name),
+            ('EC2SecurityGroupOwnerId', ec2_security_group_owner_id))
+        params['DBSecurityGroupName'] = group_name
         return self.get_object('AuthorizeDBSecurityGroupIngress', params,
                                DBSecurityGroup)
 
@@ -928,13 +1460,11 @@ class RDSConnection(AWSQueryConnection):
         :rtype: bool
         :return: True if successful.
         """
-        params = {'DBSecurityGroupName': group_name}
-        if ec2_security_group_name:
-            params['EC2SecurityGroupName'] = ec2_security_group_name
-        if ec2_security_group_owner_id:
-            params['EC2SecurityGroupOwnerId'] = ec2_security_group_owner_id
-        if cidr_ip:
-            params['CIDRIP'] = cidr_ip
+        params = _optional_params(
+            ('CIDRIP', cidr_ip),
+            ('EC2SecurityGroupName', ec2_security_group_name),
+            ('EC2SecurityGroupOwnerId', ec2_security_group_owner_id))
+        params['DBSecurityGroupName'] = group_name
         return self.get_object('RevokeDBSecurityGroupIngress', params,
                                DBSecurityGroup)
 
@@ -942,10 +1472,66 @@ class RDSConnection(AWSQueryConnection):
     # in previous versions.  I have renamed it to match the others.
     revoke_security_group = revoke_dbsecurity_group
 
+    def authorize_dbsecurity_group_bulk(self, group_name, cidr_ips=None,
+                                        ec2_groups=None):
+        """
+        Add several rules to an existing security group.  RDS takes one
+        rule per request, so the requests are issued concurrently with
+        call_parallel.
+
+        :type group_name: string
+        :param group_name: The name of the security group you are adding
+                           the rules to.
+
+        :type cidr_ips: list of strings
+        :param cidr_ips: The CIDR blocks to authorize.
+
+        :type ec2_groups: list of tuples
+        :param ec2_groups: The EC2 security groups to authorize, as
+                           (name, owner_id) tuples.
+
+        :rtype: list
+        :return: The :class:`boto.rds.dbsecuritygroup.DBSecurityGroup`
+                 returned for each rule, CIDR blocks first.
+
+        :raises: :class:`boto.exception.RDSBulkRuleError` if any rule
+                 could not be added, once all the requests have finished.
+        """
+        return self._change_rules_bulk('authorize_dbsecurity_group',
+                                       group_name, cidr_ips, ec2_groups)
+
+    def revoke_dbsecurity_group_bulk(self, group_name, cidr_ips=None,
+                                     ec2_groups=None):
+        """
+        Remove several rules from an existing security group.  The
+        arguments and return value are the same as for
+        authorize_dbsecurity_group_bulk.
+        """
+        return self._change_rules_bulk('revoke_dbsecurity_group',
+                                       group_name, cidr_ips, ec2_groups)
+
+    def _change_rules_bulk(self, method_name, group_name, cidr_ips,
+                           ec2_groups):
+        calls = [(method_name, (group_name,), {'cidr_ip': cidr_ip})
+                 for cidr_ip in cidr_ips or ()]
+        calls.extend((method_name, (group_name,),
+                      {'ec2_security_group_name': name,
+                       'ec2_security_group_owner_id': owner_id})
+                     for name, owner_id in ec2_groups or ())
+        results, errors = self._run_parallel(calls)
+        failed = len(errors) - errors.count(None)
+        if failed:
+            raise RDSBulkRuleError(
+                '%d of %d rules failed' % (failed, len(calls)),
+                [error[1] if error else result
+                 for result, error in zip(results, errors)])
+        return results
+
     # DBSnapshot methods
 
     def get_all_dbsnapshots(self, snapshot_id=None, instance_id=None,
-                            max_records=None, marker=None):
+                            max_records=None, marker=None,
+                            auto_paginate=False):
         """
         Get information about DB Snapshots.
 
@@ -964,24 +1550,74 @@ class RDSConnection(AWSQueryConnection):
                             If more results are available, a MoreToken will
                             be returned in the response that can be used to
                             retrieve additional records.  Default is 100.
+                            Must be between 20 and 100.
 
         :type marker: str
         :param marker: The marker provided by a previous request.
 
+        :type auto_paginate: bool
+        :param auto_paginate: If True, keep following the marker until
+                              all DBSnapshots have been retrieved rather
+                              than returning a single page.
+
         :rtype: list
         :return: A list of :class:`boto.rds.dbsnapshot.DBSnapshot`
         """
-        params = {}
+        if auto_paginate:
+            return list(self.iter_dbsnapshots(snapshot_id, instance_id,
+                                              max_records, marker))
+        params = _optional_params(('DBSnapshotIdentifier', snapshot_id),
+                                  ('DBInstanceIdentifier', instance_id),
+                                  ('Marker', marker))
+        params['MaxRecords'] = _max_records(max_records)
+        return self._cached_describe(
+            self.get_list, 'DescribeDBSnapshots', params,
+            [('DBSnapshot', DBSnapshot)])
+
+    def iter_dbsnapshots(self, snapshot_id=None, instance_id=None,
+                         page_size=None, marker=None, prefetch=False):
+        """
+        Iterate over DB Snapshots, requesting the next page of results
+        only once the previous one has been consumed.
+
+        :type snapshot_id: str
+        :param snapshot_id: The unique identifier of an RDS snapshot.
+                            If not provided, all RDS snapshots will be returned.
+
+        :type instance_id: str
+        :param instance_id: The identifier of a DBInstance.  If provided,
+                            only the DBSnapshots related to that instance will
+                            be returned.
+
+        :type page_size: int
+        :param page_size: The maximum number of records to request per
+                          page.  Default is 100.  Must be between 20
+                          and 100.
+
+        :type marker: str
+        :param marker: The marker provided by a previous request.
+
+        :type prefetch: bool
+        :param prefetch: If True, read the pages in a background thread
+                         up to a page ahead of the caller, so the next
+                         page is fetched while the current one is
+                         being consumed.
+
+        :rtype: generator
+        :return: A generator of :class:`boto.rds.dbsnapshot.DBSnapshot`
+        """
+        params = {'MaxRecords': _max_records(page_size)}
         if snapshot_id:
             params['DBSnapshotIdentifier'] = snapshot_id
         if instance_id:
             params['DBInstanceIdentifier'] = instance_id
-        if max_records:
-            params['MaxRecords'] = max_records
         if marker:
             params['Marker'] = marker
-        return self.get_list('DescribeDBSnapshots', params,
-                             [('DBSnapshot', DBSnapshot)])
+        snapshots = self._iter_list('DescribeDBSnapshots', params,
+                                    [('DBSnapshot', DBSnapshot)])
+        if prefetch:
+            return self._prefetch(snapshots, params['MaxRecords'])
+        return snapshots
 
     def create_dbsnapshot(self, snapshot_id, dbinstance_id):
         """
@@ -1061,19 +1697,20 @@ class RDSConnection(AWSQueryConnection):
         :rtype: :class:`boto.rds.dbinstance.DBInstance`
         :return: The newly created DBInstance
         """
-        params = {'DBSnapshotIdentifier': identifier,
-                  'DBInstanceIdentifier': instance_id,
-                  'DBInstanceClass': instance_class}
-        if port:
-            params['Port'] = port
-        if availability_zone:
-            params['AvailabilityZone'] = availability_zone
         if multi_az is not None:
-            params['MultiAZ'] = str(multi_az).lower()
+            multi_az = _bool_str[bool(multi_az)]
         if auto_minor_version_upgrade is not None:
-            params['AutoMinorVersionUpgrade'] = str(auto_minor_version_upgrade).lower()
-        if db_subnet_group_name is not None:
-            params['DBSubnetGroupName'] = db_subnet_group_name
+            auto_minor_version_upgrade = _bool_str[
+                bool(auto_minor_version_upgrade)]
+        params = _optional_params(
+            ('AutoMinorVersionUpgrade', auto_minor_version_upgrade),
+            ('AvailabilityZone', availability_zone),
+            ('DBSubnetGroupName', db_subnet_group_name),
+            ('MultiAZ', multi_az),
+            ('Port', port))
+        params['DBInstanceClass'] = instance_class
+        params['DBInstanceIdentifier'] = instance_id
+        params['DBSnapshotIdentifier'] = identifier
         return self.get_object('RestoreDBInstanceFromDBSnapshot',
                                params, DBInstance)
 
@@ -1119,18 +1756,15 @@ class RDSConnection(AWSQueryConnection):
         :rtype: :class:`boto.rds.dbinstance.DBInstance`
         :return: The newly created DBInstance
         """
-        params = {'SourceDBInstanceIdentifier': source_instance_id,
-                  'TargetDBInstanceIdentifier': target_instance_id}
+        params = _optional_params(('AvailabilityZone', availability_zone),
+                                  ('DBInstanceClass', dbinstance_class),
+                                  ('Port', port))
+        params['SourceDBInstanceIdentifier'] = source_instance_id
+        params['TargetDBInstanceIdentifier'] = target_instance_id
         if use_latest:
             params['UseLatestRestorableTime'] = 'true'
         elif restore_time:
             params['RestoreTime'] = restore_time.isoformat()
-        if dbinstance_class:
-            params['DBInstanceClass'] = dbinstance_class
-        if port:
-            params['Port'] = port
-        if availability_zone:
-            params['AvailabilityZone'] = availability_zone
         return self.get_object('RestoreDBInstanceToPointInTime',
                                params, DBInstance)
 
@@ -1138,7 +1772,7 @@ class RDSConnection(AWSQueryConnection):
 
     def get_all_events(self, source_identifier=None, source_type=None,
                        start_time=None, end_time=None,
-                       max_records=None, marker=None):
+                       max_records=None, marker=None, auto_paginate=False):
         """
         Get information about events related to your DBInstances,
         DBSecurityGroups and DBParameterGroups.
@@ -1172,14 +1806,57 @@ class RDSConnection(AWSQueryConnection):
                             If more results are available, a MoreToken will
                             be returned in the response that can be used to
                             retrieve additional records.  Default is 100.
+                            Must be between 20 and 100.
 
         :type marker: str
         :param marker: The marker provided by a previous request.
 
+        :type auto_paginate: bool
+        :param auto_paginate: If True, keep following the marker until
+                              all events have been retrieved rather
+                              than returning a single page.
+
         :rtype: list
         :return: A list of class:`boto.rds.event.Event`
         """
-        params = {}
+        if auto_paginate:
+            return list(self.iter_events(source_identifier, source_type,
+                                         start_time, end_time, max_records,
+                                         marker))
+        params = _optional_params(
+            ('EndTime', end_time and end_time.isoformat()),
+            ('Marker', marker),
+            ('StartTime', start_time and start_time.isoformat()))
+        params['MaxRecords'] = _max_records(max_records)
+        if source_identifier and source_type:
+            params['SourceIdentifier'] = source_identifier
+            params['SourceType'] = source_type
+        return self._cached_describe(
+            self.get_list, 'DescribeEvents', params,
+            [('Event', Event)])
+
+    def iter_events(self, source_identifier=None, source_type=None,
+                    start_time=None, end_time=None, page_size=None,
+                    marker=None, prefetch=False):
+        """
+        Iterate over the events related to your DBInstances,
+        DBSecurityGroups and DBParameterGroups, requesting the next page
+        of results only once the previous one has been consumed.
+
+        The arguments are the same as for get_all_events, except that
+        page_size sets the maximum number of records requested per page.
+        Default is 100.  Must be between 20 and 100.
+
+        :type prefetch: bool
+        :param prefetch: If True, read the pages in a background thread
+                         up to a page ahead of the caller, so the next
+                         page is fetched while the current one is
+                         being consumed.
+
+        :rtype: generator
+        :return: A generator of class:`boto.rds.event.Event`
+        """
+        params = {'MaxRecords': _max_records(page_size)}
         if source_identifier and source_type:
             params['SourceIdentifier'] = source_identifier
             params['SourceType'] = source_type
@@ -1187,8 +1864,10 @@ class RDSConnection(AWSQueryConnection):
             params['StartTime'] = start_time.isoformat()
         if end_time:
             params['EndTime'] = end_time.isoformat()
-        if max_records:
-            params['MaxRecords'] = max_records
         if marker:
             params['Marker'] = marker
-        return self.get_list('DescribeEvents', params, [('Event', Event)])
+        events = self._iter_list('DescribeEvents', params,
+                                 [('Event', Event)])
+        if prefetch:
+            return self._prefetch(events, params['MaxRecords'])
+        return events
@@ -21,10 +21,20 @@
 # IN THE SOFTWARE.
 #
 
+from StringIO import StringIO
+import threading
+import time
+
+import mock
+
 from tests.unit import unittest
 from tests.unit import AWSMockServiceTestCase
 
+import boto.rds
+from boto.exception import RDSBulkRuleError
 from boto.rds import RDSConnection
+from boto.rds.dbsecuritygroup import DBSecurityGroup
+from boto.rds.parametergroup import Parameter
 
 
 class TestRDSConnection(AWSMockServiceTestCase):
@@ -91,6 +101,7 @@ class TestRDSConnection(AWSMockServiceTestCase):
         self.assert_request_parameters({
             'Action': 'DescribeDBInstances',
             'DBInstanceIdentifier': 'instance_id',
+            'MaxRecords': 100,
         }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
                                  'SignatureVersion', 'SignatureMethod'])
         db = response[0]
@@ -125,6 +136,598 @@ class TestRDSConnection(AWSMockServiceTestCase):
         self.assertEqual(db.security_group.ec2_groups, [])
         self.assertEqual(db.security_group.ip_ranges, [])
 
+    def test_requests_reuse_pooled_connection(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.get_all_dbinstances()
+        self.service_connection.get_all_dbinstances()
+        self.assertEqual(self.https_connection_factory[0].call_count, 1)
+        self.assertEqual(self.https_connection.request.call_count, 2)
+
+    def test_call_parallel(self):
+        self.set_http_response(status_code=200)
+        instances, more_instances = self.service_connection.call_parallel(
+            ('get_all_dbinstances', ('instance_id',), {}),
+            ('get_all_dbinstances', (), {'max_records': 20}))
+        self.assertEqual(instances[0].id, 'mydbinstance2')
+        self.assertEqual(more_instances[0].id, 'mydbinstance2')
+
+    def test_call_parallel_reraises_errors(self):
+        self.set_http_response(status_code=200)
+        self.assertRaises(AttributeError,
+                          self.service_connection.call_parallel,
+                          ('get_all_dbinstances', (), {}),
+                          ('get_all_nothing', (), {}))
+
+    def test_describe_cache(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.describe_cache_ttl = 60
+        first = self.service_connection.get_all_dbinstances('simcoprod01')
+        second = self.service_connection.get_all_dbinstances('simcoprod01')
+        self.assertEqual([db.id for db in first], [db.id for db in second])
+        self.assertIsNot(first, second)
+        self.assertEqual(self.https_connection.request.call_count, 1)
+        self.service_connection.get_all_dbinstances('simcoprod02')
+        self.assertEqual(self.https_connection.request.call_count, 2)
+        self.service_connection.reboot_dbinstance('simcoprod01')
+        self.service_connection.get_all_dbinstances('simcoprod01')
+        self.assertEqual(self.https_connection.request.call_count, 4)
+
+    def test_describe_cache_returns_copies(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.describe_cache_ttl = 60
+        first = self.service_connection.get_all_dbinstances('simcoprod01')
+        instance_id = first[0].id
+        first[0].id = 'changed'
+        first[0].security_groups.append('changed')
+        second = self.service_connection.get_all_dbinstances('simcoprod01')
+        self.assertEqual(second[0].id, instance_id)
+        self.assertNotIn('changed', second[0].security_groups)
+        self.assertIs(second[0].connection, self.service_connection)
+        self.assertEqual(self.https_connection.request.call_count, 1)
+
+    def test_describe_cache_disabled_by_default(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.get_all_dbinstances('simcoprod01')
+        self.service_connection.get_all_dbinstances('simcoprod01')
+        self.assertEqual(self.https_connection.request.call_count, 2)
+
+    def test_reset_parameter_group(self):
+        self.set_http_response(status_code=200)
+        parameters = []
+        for name in ('max_connections', 'wait_timeout'):
+            parameter = Parameter(name=name)
+            parameter.apply_type = 'dynamic'
+            parameter.apply_method = 'immediate'
+            parameters.append(parameter)
+        self.service_connection.reset_parameter_group(
+            'mygroup', parameters=parameters)
+        self.assert_request_parameters({
+            'Action': 'ResetDBParameterGroup',
+            'DBParameterGroupName': 'mygroup',
+            'Parameters.member.1.ApplyMethod': 'immediate',
+            'Parameters.member.1.ParameterName': 'max_connections',
+            'Parameters.member.2.ApplyMethod': 'immediate',
+            'Parameters.member.2.ParameterName': 'wait_timeout',
+            'ResetAllParameters': 'false',
+        }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
+                                 'SignatureVersion', 'SignatureMethod'])
+
+    def test_restore_dbinstance_from_dbsnapshot(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.restore_dbinstance_from_dbsnapshot(
+            'mysnapshot', 'mydbinstance', 'db.m1.small', multi_az=False)
+        self.assert_request_parameters({
+            'Action': 'RestoreDBInstanceFromDBSnapshot',
+            'DBInstanceClass': 'db.m1.small',
+            'DBInstanceIdentifier': 'mydbinstance',
+            'DBSnapshotIdentifier': 'mysnapshot',
+            'MultiAZ': 'false',
+        }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
+                                 'SignatureVersion', 'SignatureMethod'])
+
+    def test_authorize_dbsecurity_group_cidr_ip(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.authorize_dbsecurity_group(
+            'mygroup', cidr_ip='10.0.0.0/8')
+        self.assert_request_parameters({
+            'Action': 'AuthorizeDBSecurityGroupIngress',
+            'CIDRIP': '10.0.0.0/8',
+            'DBSecurityGroupName': 'mygroup',
+        }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
+                                 'SignatureVersion', 'SignatureMethod'])
+
+    def test_get_all_default_max_records(self):
+        self.set_http_response(status_code=200)
+        for method in ('get_all_dbsecurity_groups', 'get_all_dbsnapshots',
+                       'get_all_events'):
+            getattr(self.service_connection, method)()
+            self.assertEqual(self.actual_request.params['MaxRecords'], 100)
+        self.service_connection.get_all_dbparameters('mygroup')
+        self.assertEqual(self.actual_request.params['MaxRecords'], 100)
+
+    def count_requests(self):
+        # Mock's call_count is not safe to update from several threads.
+        connection = self.service_connection
+        lock = threading.Lock()
+        requests = [0]
+        mexe = connection._mexe
+
+        def counting_mexe(*args, **kwargs):
+            with lock:
+                requests[0] += 1
+            return mexe(*args, **kwargs)
+
+        connection._mexe = counting_mexe
+        return requests
+
+    def test_call_parallel_mutating_calls(self):
+        self.set_http_response(status_code=200)
+        requests = self.count_requests()
+        snapshots = self.service_connection.call_parallel(
+            ('create_dbsnapshot', ('mysnapshot1', 'mydbinstance'), {}),
+            ('create_dbsnapshot', ('mysnapshot2', 'mydbinstance'), {}))
+        self.assertEqual(len(snapshots), 2)
+        self.assertEqual(requests[0], 2)
+
+    def test_delete_dbinstance(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.delete_dbinstance('mydbinstance',
+                                                  skip_final_snapshot=True)
+        self.assertEqual(self.actual_request.params['SkipFinalSnapshot'],
+                         'true')
+        self.assertNotIn('FinalDBSnapshotIdentifier',
+                         self.actual_request.params)
+        self.service_connection.delete_dbinstance(
+            'mydbinstance', final_snapshot_id='mysnapshot')
+        self.assertEqual(self.actual_request.params['SkipFinalSnapshot'],
+                         'false')
+        self.assertEqual(
+            self.actual_request.params['FinalDBSnapshotIdentifier'],
+            'mysnapshot')
+
+    def test_authorize_dbsecurity_group_bulk(self):
+        self.set_http_response(status_code=200)
+        requests = self.count_requests()
+        groups = self.service_connection.authorize_dbsecurity_group_bulk(
+            'mygroup', cidr_ips=['10.0.0.0/8', '192.168.0.0/16'],
+            ec2_groups=[('web', '123456789012')])
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(requests[0], 3)
+
+    def test_revoke_dbsecurity_group_bulk_reports_failures(self):
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(status_code=200),
+            self.create_response(status_code=400)]
+        try:
+            self.service_connection.revoke_dbsecurity_group_bulk(
+                'mygroup', cidr_ips=['10.0.0.0/8', '192.168.0.0/16'])
+        except RDSBulkRuleError, e:
+            errors = [result for result in e.results
+                      if isinstance(result, Exception)]
+            self.assertEqual(len(e.results), 2)
+            self.assertEqual(len(errors), 1)
+            self.assertEqual(e.message, '1 of 2 rules failed')
+        else:
+            self.fail('RDSBulkRuleError not raised')
+
+    def limit_requests_in_flight(self, limit):
+        connection = self.service_connection
+        connection.MaxParallelCalls = limit
+        connection._parallel_calls = threading.BoundedSemaphore(limit)
+        lock = threading.Lock()
+        stats = {'in_flight': 0, 'most_in_flight': 0, 'requests': 0}
+        mexe = connection._mexe
+
+        def slow_mexe(*args, **kwargs):
+            with lock:
+                stats['requests'] += 1
+                stats['in_flight'] += 1
+                stats['most_in_flight'] = max(stats['most_in_flight'],
+                                              stats['in_flight'])
+            time.sleep(0.01)
+            with lock:
+                stats['in_flight'] -= 1
+            return mexe(*args, **kwargs)
+
+        connection._mexe = slow_mexe
+        return stats
+
+    def test_call_parallel_bounds_requests_in_flight(self):
+        self.set_http_response(status_code=200)
+        stats = self.limit_requests_in_flight(2)
+        results = self.service_connection.call_parallel(
+            *[('reboot_dbinstance', ('mydbinstance%d' % i,), {})
+              for i in range(6)])
+        self.assertEqual(len(results), 6)
+        self.assertEqual(stats['most_in_flight'], 2)
+
+    def test_nested_call_parallel(self):
+        self.set_http_response(status_code=200)
+        stats = self.limit_requests_in_flight(2)
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                self.service_connection.call_parallel(
+                    ('get_all_dbinstances_and_parameter_groups', (), {}),
+                    ('get_all_dbinstances_and_parameter_groups', (), {}))))
+        thread.daemon = True
+        thread.start()
+        thread.join(5)
+        self.assertFalse(thread.isAlive())
+        self.assertEqual(len(results[0]), 2)
+        self.assertEqual(stats['requests'], 4)
+        self.assertEqual(stats['most_in_flight'], 2)
+
+    def test_make_request_counts_waits(self):
+        self.set_http_response(status_code=200)
+        connection = self.service_connection
+        connection._parallel_calls = threading.BoundedSemaphore(1)
+        connection._parallel_calls.acquire()
+        threading.Timer(0.01, connection._parallel_calls.release).start()
+        connection.reboot_dbinstance('mydbinstance')
+        self.assertEqual(connection.parallel_call_waits, 1)
+
+    throttled_body = """
+        <ErrorResponse>
+          <Error>
+            <Type>Sender</Type>
+            <Code>Throttling</Code>
+            <Message>Rate exceeded</Message>
+          </Error>
+        </ErrorResponse>
+        """
+
+    def test_throttled_requests_are_retried(self):
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(status_code=400, body=self.throttled_body),
+            self.create_response(status_code=200)]
+        with mock.patch('time.sleep') as sleep:
+            self.service_connection.reboot_dbinstance('mydbinstance')
+        self.assertEqual(self.https_connection.request.call_count, 2)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(self.service_connection.throttled_requests, 1)
+
+    def test_throttled_requests_give_up(self):
+        self.service_connection.num_retries = 1
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(status_code=400, body=self.throttled_body),
+            self.create_response(status_code=400, body=self.throttled_body)]
+        with mock.patch('time.sleep'):
+            try:
+                self.service_connection.reboot_dbinstance('mydbinstance')
+            except self.service_connection.ResponseError, e:
+                self.assertEqual(e.error_code, 'Throttling')
+            else:
+                self.fail('ResponseError not raised')
+        self.assertEqual(self.https_connection.request.call_count, 2)
+
+    def test_other_client_errors_are_not_retried(self):
+        self.set_http_response(status_code=400)
+        self.assertRaises(self.service_connection.ResponseError,
+                          self.service_connection.reboot_dbinstance,
+                          'mydbinstance')
+        self.assertEqual(self.https_connection.request.call_count, 1)
+
+    def test_client_errors_return_the_connection_to_the_pool(self):
+        self.set_http_response(status_code=400)
+        connection = self.service_connection
+        with mock.patch.object(connection, 'put_http_connection') as put:
+            self.assertRaises(connection.ResponseError,
+                              connection.reboot_dbinstance, 'mydbinstance')
+        self.assertEqual(put.call_count, 1)
+
+    def test_throttled_requests_honour_override_num_retries(self):
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(status_code=400, body=self.throttled_body),
+            self.create_response(status_code=400, body=self.throttled_body)]
+        with mock.patch('time.sleep'):
+            response = self.service_connection.make_request(
+                'RebootDBInstance', override_num_retries=1)
+        self.assertEqual(response.status, 400)
+        self.assertEqual(self.https_connection.request.call_count, 2)
+
+    def set_paged_http_responses(self):
+        first_page = """
+        <DescribeDBInstancesResponse>
+          <DescribeDBInstancesResult>
+            <Marker>next-page</Marker>
+            <DBInstances>
+              <DBInstance>
+                <DBInstanceIdentifier>mydbinstance1</DBInstanceIdentifier>
+              </DBInstance>
+            </DBInstances>
+          </DescribeDBInstancesResult>
+        </DescribeDBInstancesResponse>
+        """
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(status_code=200, body=first_page),
+            self.create_response(status_code=200)]
+
+    def test_get_all_db_instances_rejects_invalid_max_records(self):
+        self.set_http_response(status_code=200)
+        for max_records in (0, 19, 101):
+            self.assertRaises(ValueError,
+                              self.service_connection.get_all_dbinstances,
+                              max_records=max_records)
+        self.assertEqual(self.https_connection.request.call_count, 0)
+
+    def test_iter_dbinstances_follows_marker(self):
+        self.set_paged_http_responses()
+        markers = []
+        mexe_spy = self.service_connection._mexe
+
+        def record_marker(request, *args, **kwargs):
+            markers.append(request.params.get('Marker'))
+            return mexe_spy(request, *args, **kwargs)
+
+        self.service_connection._mexe = record_marker
+        instances = self.service_connection.iter_dbinstances(page_size=20)
+        self.assertEqual(markers, [])
+        self.assertEqual(instances.next().id, 'mydbinstance1')
+        self.assertEqual(markers, [None])
+        self.assertEqual([db.id for db in instances], ['mydbinstance2'])
+        self.assertEqual(markers, [None, 'next-page'])
+        self.assertEqual(self.actual_request.params['MaxRecords'], 20)
+
+    def test_get_all_dbsnapshots_auto_paginate(self):
+        first_page = """
+        <DescribeDBSnapshotsResponse>
+          <DescribeDBSnapshotsResult>
+            <Marker>next-page</Marker>
+            <DBSnapshots>
+              <DBSnapshot>
+                <DBSnapshotIdentifier>mysnapshot1</DBSnapshotIdentifier>
+              </DBSnapshot>
+            </DBSnapshots>
+          </DescribeDBSnapshotsResult>
+        </DescribeDBSnapshotsResponse>
+        """
+        second_page = first_page.replace(
+            '<Marker>next-page</Marker>', '').replace('1<', '2<')
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(status_code=200, body=first_page),
+            self.create_response(status_code=200, body=second_page)]
+        snapshots = self.service_connection.get_all_dbsnapshots(
+            instance_id='mydbinstance', auto_paginate=True)
+        self.assertEqual([s.id for s in snapshots],
+                         ['mysnapshot1', 'mysnapshot2'])
+        self.assertEqual(self.actual_request.params['Marker'], 'next-page')
+        self.assertEqual(
+            self.actual_request.params['DBInstanceIdentifier'],
+            'mydbinstance')
+
+    def test_get_all_dbparameters_auto_paginate(self):
+        page = """
+        <DescribeDBParametersResponse>
+          <DescribeDBParametersResult>
+            %s
+            <Parameters>
+              <Parameter><ParameterName>%s</ParameterName></Parameter>
+              <Parameter><ParameterName>last</ParameterName></Parameter>
+            </Parameters>
+          </DescribeDBParametersResult>
+        </DescribeDBParametersResponse>
+        """
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(
+                status_code=200,
+                body=page % ('<Marker>next-page</Marker>', 'first')),
+            self.create_response(status_code=200,
+                                 body=page % ('', 'second'))]
+        pg = self.service_connection.get_all_dbparameters(
+            'mygroup', auto_paginate=True)
+        self.assertIn('first', pg)
+        self.assertIn('second', pg)
+        self.assertEqual(pg.name, 'mygroup')
+        self.assertEqual(pg.Marker, None)
+        self.assertEqual(self.actual_request.params['Marker'], 'next-page')
+
+    def set_paged_event_responses(self, second_status=200):
+        page = """
+        <DescribeEventsResponse>
+          <DescribeEventsResult>
+            %s
+            <Events>
+              <Event><Message>%s</Message></Event>
+            </Events>
+          </DescribeEventsResult>
+        </DescribeEventsResponse>
+        """
+        self.https_connection.getresponse.side_effect = [
+            self.create_response(
+                status_code=200,
+                body=page % ('<Marker>next-page</Marker>', 'first')),
+            self.create_response(status_code=second_status,
+                                 body=page % ('', 'second'))]
+
+    def test_iter_events_prefetch(self):
+        self.set_paged_event_responses()
+        events = self.service_connection.iter_events(page_size=20,
+                                                     prefetch=True)
+        self.assertEqual([e.message for e in events], ['first', 'second'])
+        self.assertEqual(self.actual_request.params['Marker'], 'next-page')
+        self.assertEqual(self.actual_request.params['MaxRecords'], 20)
+
+    def test_iter_events_prefetch_reraises_errors(self):
+        self.set_paged_event_responses(second_status=400)
+        events = self.service_connection.iter_events(prefetch=True)
+        self.assertEqual(events.next().message, 'first')
+        self.assertRaises(self.service_connection.ResponseError,
+                          events.next)
+
+    def test_iter_dbinstances_streams_response(self):
+        body = """
+        <DescribeDBInstancesResponse>
+          <DescribeDBInstancesResult>
+            <DBInstances>
+              <DBInstance>
+                <DBInstanceIdentifier>mydbinstance1</DBInstanceIdentifier>
+              </DBInstance>
+              <DBInstance>
+                <DBInstanceIdentifier>mydbinstance2</DBInstanceIdentifier>
+              </DBInstance>
+              <DBInstance>
+                <DBInstanceIdentifier>mydbinstance3</DBInstanceIdentifier>
+              </DBInstance>
+            </DBInstances>
+          </DescribeDBInstancesResult>
+        </DescribeDBInstancesResponse>
+        """
+        response = self.create_response(status_code=200)
+        response.read.side_effect = StringIO(body).read
+        self.https_connection.getresponse.return_value = response
+        self.service_connection.ResponseChunkSize = 64
+        reads_before_yield = []
+        ids = []
+        for db in self.service_connection.iter_dbinstances():
+            reads_before_yield.append(response.read.call_count)
+            ids.append(db.id)
+        self.assertEqual(ids, ['mydbinstance1', 'mydbinstance2',
+                               'mydbinstance3'])
+        self.assertTrue(reads_before_yield[0] < response.read.call_count)
+
+    def test_get_all_dbinstances_auto_paginate(self):
+        self.set_paged_http_responses()
+        response = self.service_connection.get_all_dbinstances(
+            auto_paginate=True)
+        self.assertEqual([db.id for db in response],
+                         ['mydbinstance1', 'mydbinstance2'])
+
+    def test_create_db_instance_security_groups(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.create_dbinstance(
+            'SimCoProd01', 10, 'db.m1.large', 'main', 'Password01',
+            security_groups=[DBSecurityGroup(name='web'), 'default'])
+        self.assertEqual(
+            self.actual_request.params['DBSecurityGroups.member.1'], 'web')
+        self.assertEqual(
+            self.actual_request.params['DBSecurityGroups.member.2'],
+            'default')
+
+    def test_create_db_instance_keeps_false_values(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.create_dbinstance(
+            'SimCoProd01', 10, 'db.m1.large', 'main', 'Password01',
+            backup_retention_period=0, auto_minor_version_upgrade=False)
+        self.assert_request_parameters({
+            'Action': 'CreateDBInstance',
+            'AllocatedStorage': 10,
+            'AutoMinorVersionUpgrade': 'false',
+            'BackupRetentionPeriod': 0,
+            'DBInstanceClass': 'db.m1.large',
+            'DBInstanceIdentifier': 'SimCoProd01',
+            'Engine': 'MySQL5.1',
+            'MainUsername': 'main',
+            'MainUserPassword': 'Password01',
+            'MultiAZ': 'false',
+            'Port': 3306,
+        }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
+                                 'SignatureVersion', 'SignatureMethod'])
+
+    def test_modify_db_instance(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.modify_dbinstance(
+            'SimCoProd01', param_group='default.mysql5.5',
+            security_groups=['default'], main_password='Password01',
+            allocated_storage=20, backup_retention_period=0,
+            apply_immediately=True, iops=None)
+        self.assert_request_parameters({
+            'Action': 'ModifyDBInstance',
+            'AllocatedStorage': 20,
+            'ApplyImmediately': 'true',
+            'BackupRetentionPeriod': 0,
+            'DBInstanceIdentifier': 'SimCoProd01',
+            'DBParameterGroupName': 'default.mysql5.5',
+            'DBSecurityGroups.member.1': 'default',
+            'MainUserPassword': 'Password01',
+        }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
+                                 'SignatureVersion', 'SignatureMethod'])
+
+    def test_modify_db_instance_security_group_objects(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.modify_dbinstance(
+            'SimCoProd01', security_groups=[DBSecurityGroup(name='web'),
+                                            'default'])
+        self.assertEqual(
+            self.actual_request.params['DBSecurityGroups.member.1'], 'web')
+        self.assertEqual(
+            self.actual_request.params['DBSecurityGroups.member.2'],
+            'default')
+
+    def test_modify_db_instance_omits_multi_az_by_default(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.modify_dbinstance('SimCoProd01')
+        self.assert_request_parameters({
+            'Action': 'ModifyDBInstance',
+            'DBInstanceIdentifier': 'SimCoProd01',
+        }, ignore_params_values=['AWSAccessKeyId', 'Timestamp', 'Version',
+                                 'SignatureVersion', 'SignatureMethod'])
+
+    def test_modify_db_instance_multi_az(self):
+        self.set_http_response(status_code=200)
+        self.service_connection.modify_dbinstance('SimCoProd01',
+                                                  multi_az=False)
+        self.assertEqual(self.actual_request.params['MultiAZ'], 'false')
+        self.service_connection.modify_dbinstance('SimCoProd01',
+                                                  multi_az=True)
+        self.assertEqual(self.actual_request.params['MultiAZ'], 'true')
+
+
+class TestRDSRegions(unittest.TestCase):
+
+    def setUp(self):
+        boto.rds.clear_region_cache()
+
+    def tearDown(self):
+        boto.rds.clear_region_cache()
+
+    def test_connect_to_region(self):
+        connection = boto.rds.connect_to_region(
+            'eu-west-1', aws_access_key_id='aws_access_key_id',
+            aws_secret_access_key='aws_secret_access_key')
+        self.assertIsInstance(connection, RDSConnection)
+        self.assertEqual(connection.host, 'rds.eu-west-1.amazonaws.com')
+        self.assertEqual(connection.region.name, 'eu-west-1')
+
+    def test_connect_to_region_reuses_connections(self):
+        connection = boto.rds.connect_to_region(
+            'eu-west-1', aws_access_key_id='aws_access_key_id',
+            aws_secret_access_key='aws_secret_access_key')
+        self.assertIs(connection, boto.rds.connect_to_region(
+            'eu-west-1', aws_access_key_id='aws_access_key_id',
+            aws_secret_access_key='aws_secret_access_key'))
+        self.assertIsNot(connection, boto.rds.connect_to_region(
+            'eu-west-1', aws_access_key_id='aws_access_key_id',
+            aws_secret_access_key='other_secret_access_key'))
+        self.assertIsNot(connection, boto.rds.connect_to_region(
+            'us-west-1', aws_access_key_id='aws_access_key_id',
+            aws_secret_access_key='aws_secret_access_key'))
+        boto.rds.clear_region_cache()
+        self.assertIsNot(connection, boto.rds.connect_to_region(
+            'eu-west-1', aws_access_key_id='aws_access_key_id',
+            aws_secret_access_key='aws_secret_access_key'))
+
+    def test_connection_cache_key_with_unicode_secret(self):
+        key = boto.rds._connection_cache_key(
+            'eu-west-1', {'aws_secret_access_key': u'secr\xe8t'})
+        self.assertEqual(key, boto.rds._connection_cache_key(
+            'eu-west-1', {'aws_secret_access_key': 'secr\xc3\xa8t'}))
+        self.assertNotIn(u'secr\xe8t', key[1])
+
+    def test_model_classes_are_exported(self):
+        for name in ('DBInstance', 'DBSecurityGroup', 'DBSnapshot',
+                     'Event', 'ParameterGroup'):
+            self.assertTrue(hasattr(boto.rds, name), name)
+
+    def test_connect_to_unknown_region(self):
+        self.assertIsNone(boto.rds.connect_to_region('moon-west-1'))
+
+    def test_regions_returns_a_new_list(self):
+        regions = boto.rds.regions()
+        self.assertEqual(regions[0].name, 'us-east-1')
+        del regions[:]
+        self.assertEqual(len(boto.rds.regions()), 8)
+
 
 if __name__ == '__main__':
     unittest.main()